@@ -0,0 +1,346 @@
+import asyncio
+import os
+import sys
+import time
+import threading
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from concurrent.futures import ThreadPoolExecutor
+import dotenv
+dotenv.load_dotenv()
+
+# How long a shared-cache miss for (video, artifact) is remembered before asking again
+ARTIFACT_CACHE_NEGATIVE_TTL = float(os.getenv('ARTIFACT_CACHE_NEGATIVE_TTL', 30))
+
+def estimate_size(value, _depth=0):
+    """Rough byte size of a cached artifact, including FAISS index memory."""
+    if _depth > 4:
+        return sys.getsizeof(value)
+    if isinstance(value, (str, bytes, bytearray)):
+        return sys.getsizeof(value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(
+            estimate_size(k, _depth + 1) + estimate_size(v, _depth + 1) for k, v in value.items()
+        )
+    if isinstance(value, (list, tuple, set)):
+        return sys.getsizeof(value) + sum(estimate_size(item, _depth + 1) for item in value)
+    if hasattr(value, "page_content"):
+        # langchain Document
+        return sys.getsizeof(value) + estimate_size(value.page_content, _depth + 1) + \
+               estimate_size(getattr(value, "metadata", {}), _depth + 1)
+    index = getattr(value, "index", None)
+    if index is not None and hasattr(index, "ntotal") and hasattr(index, "d"):
+        # FAISS vectorstore: float32 vectors plus the documents held in its docstore
+        size = index.ntotal * index.d * 4
+        docstore = getattr(getattr(value, "docstore", None), "_dict", None)
+        if docstore:
+            size += estimate_size(list(docstore.values()), _depth + 1)
+        return size
+    nbytes = getattr(value, "nbytes", None)
+    if isinstance(nbytes, int):
+        # Compact containers (arrays, TranscriptIndex) report their own footprint
+        return nbytes
+    return sys.getsizeof(value)
+
+
+class CacheEntry(MutableMapping):
+    """Artifacts cached for one video (Comments, Summary, Vectorstore, ...).
+
+    Behaves like the plain dict it replaces, but tracks the size of each
+    artifact and drops artifacts whose TTL has passed.
+    """
+
+    def __init__(self, owner, video_id):
+        self._owner = owner
+        self._video_id = video_id
+        self._data = {}
+        self._sizes = {}
+        self._stored_at = {}
+
+    def _expired(self, key):
+        ttl = self._owner.ttl_for(key)
+        return ttl is not None and time.monotonic() - self._stored_at[key] > ttl
+
+    def __getitem__(self, key):
+        if key in self._data and self._expired(key):
+            self._owner.expirations += 1
+            self._remove(key)
+        return self._data[key]
+
+    def __setitem__(self, key, value):
+        self._store(key, value)
+        self._owner._l2_set(self._video_id, key, value)
+
+    def _store(self, key, value):
+        size = estimate_size(value)
+        delta = size - self._sizes.get(key, 0)
+        self._data[key] = value
+        self._sizes[key] = size
+        self._stored_at[key] = time.monotonic()
+        self._owner._resize(self, delta)
+
+    def __delitem__(self, key):
+        if key not in self._data:
+            raise KeyError(key)
+        self._remove(key)
+
+    def _remove(self, key):
+        del self._data[key]
+        self._stored_at.pop(key, None)
+        self._owner._resize(self, -self._sizes.pop(key, 0))
+
+    def __contains__(self, key):
+        try:
+            self[key]
+        except KeyError:
+            return False
+        return True
+
+    def __iter__(self):
+        return iter(list(self._data))
+
+    def __len__(self):
+        return len(self._data)
+
+    @property
+    def size(self):
+        return sum(self._sizes.values())
+
+    def artifact_sizes(self):
+        return dict(self._sizes)
+
+
+class ArtifactCache(MutableMapping):
+    """video_id -> CacheEntry mapping with a global byte budget, LRU eviction
+    of whole videos and per-artifact TTLs.
+
+    With a shared backend (see cache_backends), artifacts listed in `versions`
+    are written through to it under "<namespace>:<artifact>:<version>:<video_id>",
+    so worker processes reuse each other's work. Lookups only ever touch local
+    memory; async callers `await prefetch(video_id)` first to pull shared copies
+    in. All backend I/O runs in order on one background thread, and misses are
+    remembered for `negative_ttl` seconds. Artifacts that are not
+    JSON-serializable can be given an (encode, decode) pair in `codecs`.
+    """
+
+    def __init__(self, max_bytes, artifact_ttls=None, default_ttl=None,
+                 backend=None, namespace="", versions=None, codecs=None,
+                 negative_ttl=ARTIFACT_CACHE_NEGATIVE_TTL):
+        self.max_bytes = max_bytes
+        self.artifact_ttls = artifact_ttls or {}
+        self.default_ttl = default_ttl
+        # The "none" backend stores nothing, so skip the I/O thread altogether
+        self.backend = backend if backend is not None and backend.name != "none" else None
+        self.namespace = namespace
+        self.versions = versions or {}
+        self.codecs = codecs or {}
+        self.negative_ttl = negative_ttl
+        self.l2_hits = 0
+        self.l2_negative_hits = 0
+        self._l2_misses = {}
+        self._l2_executor = None
+        self._entries = OrderedDict()
+        # Transcript jobs write from worker threads while requests read on the loop
+        self._lock = threading.RLock()
+        self.total_bytes = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def ttl_for(self, artifact):
+        return self.artifact_ttls.get(artifact, self.default_ttl)
+
+    def __getitem__(self, video_id):
+        with self._lock:
+            entry = self._entries.get(video_id)
+            if entry is None:
+                raise KeyError(video_id)
+            self._entries.move_to_end(video_id)
+            return entry
+
+    def __setitem__(self, video_id, value):
+        with self._lock:
+            if video_id in self._entries:
+                self._evict(video_id)
+            entry = CacheEntry(self, video_id)
+            self._entries[video_id] = entry
+            for key, artifact in dict(value).items():
+                entry[key] = artifact
+
+    def __delitem__(self, video_id):
+        with self._lock:
+            had_entry = self.discard(video_id)
+        if not had_entry:
+            raise KeyError(video_id)
+
+    def discard(self, video_id):
+        """Drop a video locally and from the shared cache, whether or not it is
+        loaded here. Returns True if it was in local memory."""
+        # Explicit deletes also clear the shared copies; budget evictions do not
+        with self._lock:
+            had_entry = video_id in self._entries
+            if had_entry:
+                self._evict(video_id)
+            for artifact in self.versions:
+                self._l2_misses.pop((video_id, artifact), None)
+                self._l2_delete(video_id, artifact)
+            return had_entry
+
+    def _evict(self, video_id):
+        entry = self._entries.pop(video_id)
+        self.total_bytes -= entry.size
+
+    def setdefault(self, video_id, default=None):
+        # Return the live entry, not the default dict it was created from
+        with self._lock:
+            if video_id not in self:
+                self[video_id] = default or {}
+            return self[video_id]
+
+    def __contains__(self, video_id):
+        with self._lock:
+            return video_id in self._entries
+
+    def __iter__(self):
+        return iter(list(self._entries))
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        """Drop every video, including this namespace's shared copies."""
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+            self._l2_misses.clear()
+            if self.backend is not None:
+                self._l2_submit(self.backend.clear_prefix, f"{self.namespace}:")
+
+    def peek_items(self):
+        """Iterate (video_id, entry) pairs without refreshing LRU order."""
+        with self._lock:
+            return list(self._entries.items())
+
+    def _resize(self, entry, delta):
+        with self._lock:
+            # Entries evicted while still referenced by an in-flight request are detached
+            if self._entries.get(entry._video_id) is not entry:
+                return
+            self.total_bytes += delta
+            if delta > 0:
+                self._entries.move_to_end(entry._video_id)
+                self._enforce_budget(keep=entry._video_id)
+
+    def _enforce_budget(self, keep=None):
+        while self.total_bytes > self.max_bytes and len(self._entries) > 1:
+            video_id = next(iter(self._entries))
+            if video_id == keep:
+                break
+            print(f"Evicting cached artifacts for video ID: {video_id}")
+            self._evict(video_id)
+            self.evictions += 1
+
+    def _l2_key(self, video_id, artifact):
+        return f"{self.namespace}:{artifact}:{self.versions[artifact]}:{video_id}"
+
+    def _l2_thread(self):
+        # One worker keeps reads, writes and clears in submission order
+        with self._lock:
+            if self._l2_executor is None:
+                self._l2_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"l2-{self.namespace}")
+            return self._l2_executor
+
+    def _l2_submit(self, fn, *args):
+        return self._l2_thread().submit(fn, *args)
+
+    def _l2_set(self, video_id, artifact, value):
+        if self.backend is None or artifact not in self.versions:
+            return
+        self._l2_misses.pop((video_id, artifact), None)
+        self._l2_submit(self._l2_write, self._l2_key(video_id, artifact), artifact, value)
+
+    def _l2_write(self, key, artifact, value):
+        try:
+            if artifact in self.codecs:
+                value = self.codecs[artifact][0](value)
+        except Exception as e:
+            print(f"Could not encode {artifact} for the shared cache: {e}")
+            return
+        self.backend.set(key, value, self.ttl_for(artifact))
+
+    def _l2_delete(self, video_id, artifact):
+        if self.backend is not None:
+            self._l2_submit(self.backend.delete, self._l2_key(video_id, artifact))
+
+    def _l2_read(self, video_id, artifacts):
+        """Runs on the I/O thread: {artifact: decoded value} for the shared hits."""
+        found = {}
+        for artifact in artifacts:
+            value = self.backend.get(self._l2_key(video_id, artifact))
+            if value is None:
+                continue
+            try:
+                if artifact in self.codecs:
+                    value = self.codecs[artifact][1](value)
+            except Exception as e:
+                print(f"Could not decode shared {artifact} for video ID {video_id}: {e}")
+                continue
+            found[artifact] = value
+        return found
+
+    def _missing_artifacts(self, video_id):
+        now = time.monotonic()
+        entry = self._entries.get(video_id)
+        missing = []
+        for artifact in self.versions:
+            if entry is not None and artifact in entry:
+                continue
+            if self._l2_misses.get((video_id, artifact), 0) > now:
+                self.l2_negative_hits += 1
+                continue
+            missing.append(artifact)
+        return missing
+
+    async def prefetch(self, video_id):
+        """Pull this video's shared artifacts into local memory, off the event loop.
+
+        Only artifacts missing locally are fetched, and recent misses are not
+        asked for again until negative_ttl has passed.
+        """
+        if self.backend is None:
+            return
+        with self._lock:
+            missing = self._missing_artifacts(video_id)
+        if not missing:
+            return
+        found = await asyncio.get_running_loop().run_in_executor(self._l2_thread(), self._l2_read, video_id, missing)
+        with self._lock:
+            expires = time.monotonic() + self.negative_ttl
+            for artifact in missing:
+                if artifact not in found:
+                    self._l2_misses[(video_id, artifact)] = expires
+            if len(self._l2_misses) > 10000:
+                now = time.monotonic()
+                self._l2_misses = {key: until for key, until in self._l2_misses.items() if until > now}
+            if not found:
+                return
+            entry = self._entries.get(video_id)
+            if entry is None:
+                entry = CacheEntry(self, video_id)
+                self._entries[video_id] = entry
+            for artifact, value in found.items():
+                # Something produced locally while we waited wins over the shared copy
+                if artifact not in entry:
+                    self.l2_hits += 1
+                    entry._store(artifact, value)
+
+    def metrics(self):
+        return {
+            "videos": len(self._entries),
+            "total_bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "l2_hits": self.l2_hits,
+            "l2_negative_hits": self.l2_negative_hits,
+            "l2": self.backend.stats() if self.backend is not None else None,
+        }
@@ -0,0 +1,150 @@
+"""Streaming caption parsers versus the original whole-document path
+(decode response.text, then ET.fromstring / json.loads / splitlines) on the
+caption fixtures in tests/fixtures/captions. Both sides build the same caption
+list; the bench reports parse time and peak memory (tracemalloc) for each and
+checks that their output is identical.
+
+The fixtures are a few minutes long; `scale` tiles each one end to end
+(shifting timestamps) to approximate a long video.
+
+Run from backend/: python bench/bench_captions.py [scale] [repeats]
+"""
+import copy
+import json
+import os
+import re
+import sys
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from caption_parser import parse_caption_stream, _local_name, _ttml_seconds, _ttml_text, _vtt_seconds, VTTCaptionParser
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tests", "fixtures", "captions")
+FORMATS = ("srv1", "srv2", "srv3", "json3", "vtt", "ttml")
+CHUNK_SIZE = 65536
+_CLOCK_RE = re.compile(r"(\d{2}):(\d{2}):(\d{2}\.\d{3})")
+
+def load_fixture(ext):
+    with open(os.path.join(FIXTURES, f"talk.{ext}"), "rb") as f:
+        return f.read()
+
+# Whole-document path, as fetch_transcript did it before streaming
+def _caption(start, duration, text):
+    return {'start': start, 'duration': duration, 'text': text.replace('\n', ' ')}
+
+def whole_document(body, ext):
+    text = body.decode("utf-8")  # response.text
+    if ext == "json3":
+        captions = []
+        for event in json.loads(text).get("events", []):
+            segs = event.get("segs")
+            if not segs or "tStartMs" not in event:
+                continue
+            line = "".join(seg.get("utf8", "") for seg in segs)
+            if line.strip():
+                captions.append(_caption(event["tStartMs"] / 1000, event.get("dDurationMs", 0) / 1000, line))
+        return captions
+    if ext == "vtt":
+        parser = VTTCaptionParser()
+        for line in text.splitlines():
+            parser._line(line)
+        parser._flush_cue()
+        return parser.captions
+    root = ET.fromstring(text)
+    captions = []
+    for elem in root.iter():
+        tag = _local_name(elem.tag)
+        if tag == "text":
+            if "start" in elem.attrib:
+                start, duration = float(elem.attrib["start"]), float(elem.attrib.get("dur", 0))
+            else:
+                start, duration = int(elem.attrib.get("t", 0)) / 1000, int(elem.attrib.get("d", 0)) / 1000
+            line = "".join(elem.itertext())
+        elif tag == "p" and "begin" in elem.attrib:
+            start = _ttml_seconds(elem.attrib["begin"])
+            duration = round(max(_ttml_seconds(elem.attrib["end"]) - start, 0.0), 3)
+            line = _ttml_text(elem)
+        elif tag == "p":
+            start, duration = int(elem.attrib.get("t", 0)) / 1000, int(elem.attrib.get("d", 0)) / 1000
+            line = "".join(elem.itertext())
+        else:
+            continue
+        if line.strip():
+            captions.append(_caption(start, duration, line))
+    return captions
+
+# Tiling: repeat a fixture `times` times, each copy shifted past the previous one
+def _clock(seconds):
+    return f"{int(seconds // 3600):02}:{int(seconds // 60 % 60):02}:{seconds % 60:06.3f}"
+
+def _shift_clock(value, offset):
+    return _clock(_vtt_seconds(value) + offset)
+
+def tile(body, ext, times):
+    if times <= 1:
+        return body
+    span = max(c["start"] + c["duration"] for c in whole_document(body, ext)) + 1
+    if ext == "json3":
+        doc = json.loads(body)
+        events = doc["events"]
+        doc["events"] = [dict(e, tStartMs=e["tStartMs"] + int(k * span * 1000)) for k in range(times) for e in events]
+        return json.dumps(doc, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    if ext == "vtt":
+        text = body.decode("utf-8")
+        header, _, cues = text.partition("\n\n")
+        copies = [_CLOCK_RE.sub(lambda m: _shift_clock(m.group(0), k * span), cues) for k in range(times)]
+        return (header + "\n\n" + "".join(copies)).encode("utf-8")
+    for prefix, uri in re.findall(r'xmlns:?(\w*)="([^"]+)"', body.decode("utf-8")):
+        ET.register_namespace(prefix, uri)
+    root = ET.fromstring(body)
+    parent = next(e for e in root.iter() if any(_local_name(c.tag) in ("text", "p") for c in e))
+    cues = [c for c in parent if _local_name(c.tag) in ("text", "p")]
+    for k in range(1, times):
+        for cue in cues:
+            cue = copy.deepcopy(cue)
+            if "start" in cue.attrib:
+                cue.set("start", f"{float(cue.attrib['start']) + k * span:.3f}")
+            elif "begin" in cue.attrib:
+                for attr in ("begin", "end"):
+                    cue.set(attr, _shift_clock(cue.attrib[attr], k * span))
+            else:
+                cue.set("t", str(int(cue.attrib.get("t", 0)) + int(k * span * 1000)))
+            parent.append(cue)
+    return b'<?xml version="1.0" encoding="utf-8" ?>' + ET.tostring(root, encoding="utf-8", xml_declaration=False)
+
+def chunks(body):
+    for i in range(0, len(body), CHUNK_SIZE):
+        yield body[i:i + CHUNK_SIZE]
+
+def streaming(body, ext):
+    return parse_caption_stream(chunks(body), ext)
+
+def peak_memory(fn):
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 2 ** 20
+
+def best_time(fn, repeats):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+if __name__ == "__main__":
+    scale = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    print(f"fixtures x{scale}, best of {repeats}")
+    print(f"{'format':6} {'size':>7} {'cues':>6} | {'whole-doc':>9} {'peak':>8} | {'stream':>9} {'peak':>8} | same")
+    for ext in FORMATS:
+        body = tile(load_fixture(ext), ext, scale)
+        old, new = whole_document(body, ext), streaming(body, ext)
+        old_s, new_s = best_time(lambda: whole_document(body, ext), repeats), best_time(lambda: streaming(body, ext), repeats)
+        old_peak, new_peak = peak_memory(lambda: whole_document(body, ext)), peak_memory(lambda: streaming(body, ext))
+        print(f"{ext:6} {len(body) / 2 ** 20:6.1f}M {len(new):6} | {old_s:8.3f}s {old_peak:6.1f}MB | "
+              f"{new_s:8.3f}s {new_peak:6.1f}MB | {old == new}")
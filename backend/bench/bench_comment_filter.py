@@ -0,0 +1,93 @@
+"""Comment filter engine versus the original per-comment filters on a
+synthetic corpus; also checks that both keep exactly the same comments.
+
+Run from backend/: python bench/bench_comment_filter.py [comments]
+"""
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from comment_filter import filter_comments
+
+# Original implementation, kept here only as the baseline
+def old_remove_links(comment):
+    return re.sub(r'https?://\S+|www\.\S+', '', comment).strip()
+
+def old_has_multiple_timestamps(comment):
+    return len(re.findall(r'\d{1,2}(:\d{2}){1,3}', comment)) > 3
+
+def old_has_char_timestamps(comment):
+    pattern = r'^\s*\d{1,2}(:\d{2}){1,3}[\s\u200B]*[-:|]*[\s\u200B]+[a-zA-Z]{2,}.*$'
+    return len(re.findall(pattern, comment, flags=re.MULTILINE)) > 3
+
+def old_is_code_heavy(comment):
+    comment = comment.strip()
+    keywords = re.findall(r'\b(def|class|return|import|lambda|function|const|var|=>|try|except|elif)\b', comment)
+    structures = re.findall(r'(==|===|{|}|\[|\]|::|->|=)', comment)
+    indented = re.findall(r'^\s{4,}', comment, re.MULTILINE)
+    score = 0
+    if len(keywords) >= 2:
+        score += 2
+    if len(structures) >= 3:
+        score += 2
+    if len(indented) >= 2:
+        score += 2
+    if comment.count('\n') + 1 >= 3:
+        score += 1
+    if keywords and structures:
+        score += 1
+    return score >= 5
+
+def old_clean_and_filter_comment(comment):
+    comment = old_remove_links(comment)
+    if old_is_code_heavy(comment):
+        return None
+    if old_has_multiple_timestamps(comment) and not old_has_char_timestamps(comment):
+        return None
+    if len(comment.strip()) == 0:
+        return None
+    return comment.strip()
+
+def old_process_comments(comments):
+    return [cleaned for cleaned in map(old_clean_and_filter_comment, comments) if cleaned]
+
+WORDS = "great video thanks explained really well love this channel music return class value first".split()
+
+def make_corpus(n, seed=7):
+    rng = random.Random(seed)
+    corpus = []
+    for i in range(n):
+        kind = rng.random()
+        text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 40)))
+        if kind < 0.1:
+            text += f" https://example.com/{i} www.example.org"
+        elif kind < 0.15:
+            text = "def f(x):\n    return x == 1\n    y = [x]\nclass A: pass"
+        elif kind < 0.2:
+            text = "\n".join(f"{m}:{s:02d} chapter {w}" for m, s, w in zip(range(6), range(0, 60, 10), WORDS))
+        elif kind < 0.25:
+            text = " ".join(f"{m}:{s:02d}" for m, s in zip(range(6), range(0, 60, 10))) + " lol"
+        elif kind < 0.27:
+            text = f"https://only.link/{i}"
+        corpus.append(f"@user{i}: {text} (Likes: {i % 100})")
+    return corpus
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    corpus = make_corpus(n)
+
+    start = time.perf_counter()
+    old = old_process_comments(corpus)
+    old_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    new = filter_comments(corpus)
+    new_s = time.perf_counter() - start
+
+    print(f"{n} comments, {len(old)} kept")
+    print(f"original: {old_s:.3f}s")
+    print(f"engine:   {new_s:.3f}s ({old_s / new_s:.2f}x)")
+    print(f"identical output: {old == new}")
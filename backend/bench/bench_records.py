@@ -0,0 +1,86 @@
+"""Per-request CPU cost of building /search rows: the old pandas pipeline
+versus records.build_video_record.
+
+Run from backend/: python bench/bench_records.py [rows] [repeats]
+pandas is only needed for the baseline and is skipped when missing.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from records import build_video_record, format_duration, best_thumbnail_url
+
+def make_items(n):
+    videos, channels = [], {}
+    for i in range(n):
+        channel_id = f"UC{i % 7:022d}"
+        videos.append({
+            "id": f"vid{i:08d}",
+            "snippet": {
+                "title": f"Video number {i}", "channelTitle": f"Channel {i % 7}", "channelId": channel_id,
+                "publishedAt": f"2024-0{1 + i % 9}-1{i % 10}T12:34:56Z", "description": "x" * 200,
+                "thumbnails": {"high": {"url": f"https://i.ytimg.com/vi/{i}/hq.jpg"}},
+            },
+            "statistics": {"viewCount": str(1000 + i * 37), "likeCount": str(10 + i), "commentCount": str(i)},
+            "contentDetails": {"duration": f"PT{i % 3}H{i % 60}M{i % 60}S"},
+        })
+        channels[channel_id] = {
+            "statistics": {"subscriberCount": str(5000 + i)},
+            "snippet": {"thumbnails": {"default": {"url": f"https://yt3.ggpht.com/{i}.jpg"}}},
+        }
+    return videos, channels
+
+def pandas_rows(videos, channels):
+    """The pre-change search_youtube/main.py path, kept here only as a baseline."""
+    import pandas as pd
+    structured_data = []
+    for video in videos:
+        snippet = video["snippet"]
+        statistics = video["statistics"]
+        channel = channels[snippet["channelId"]]
+        structured_data.append({
+            "Title": snippet["title"],
+            "Views": int(statistics.get("viewCount", 0)),
+            "Likes": int(statistics.get("likeCount", 0)),
+            "Comments": int(statistics.get("commentCount", 0)),
+            "Upload_date": snippet.get("publishedAt", "N/A"),
+            "Duration": format_duration(video["contentDetails"]["duration"]),
+            "Channel": snippet["channelTitle"],
+            "Subscribers": int(channel["statistics"].get("subscriberCount", 0)),
+            "Video_link": f"https://www.youtube.com/watch?v={video['id']}",
+            "Thumbnail": snippet["thumbnails"]["high"]["url"],
+            "Channel_Thumbnail": best_thumbnail_url(channel["snippet"]["thumbnails"]),
+            "Description": snippet.get("description", "No description available."),
+        })
+    df = pd.DataFrame(structured_data)
+    df['Upload_date'] = pd.to_datetime(df['Upload_date'].str.split('T').str[0])
+    df['Likes(%)'] = (df['Likes']) / (df['Views']) * 100
+    df = df[['Title', 'Channel', 'Subscribers', 'Views', 'Likes', 'Likes(%)', 'Duration', 'Upload_date',
+             'Comments', 'Video_link', 'Thumbnail', 'Channel_Thumbnail', 'Description']]
+    df['Title'] = df.apply(lambda row: f'<a href="{row["Video_link"]}" target="_blank">{row["Title"]}</a>', axis=1)
+    return df.to_dict(orient="records")
+
+def record_rows(videos, channels):
+    return [build_video_record(video, channels[video["snippet"]["channelId"]]).to_dict() for video in videos]
+
+def measure(fn, videos, channels, repeats):
+    fn(videos, channels)
+    start = time.process_time()
+    for _ in range(repeats):
+        fn(videos, channels)
+    return (time.process_time() - start) / repeats * 1000
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    videos, channels = make_items(rows)
+    records_ms = measure(record_rows, videos, channels, repeats)
+    print(f"records:  {records_ms:.3f} ms CPU per request ({rows} rows)")
+    try:
+        pandas_ms = measure(pandas_rows, videos, channels, repeats)
+    except ImportError:
+        print("pandas:   not installed, baseline skipped")
+    else:
+        print(f"pandas:   {pandas_ms:.3f} ms CPU per request ({rows} rows)")
+        print(f"saving:   {pandas_ms - records_ms:.3f} ms ({pandas_ms / records_ms:.1f}x)")
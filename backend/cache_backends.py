@@ -0,0 +1,319 @@
+import hashlib
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from urllib.parse import urlparse
+import dotenv
+dotenv.load_dotenv()
+
+# Shared (L2) artifact cache: "none", "sqlite" or "redis"
+ARTIFACT_CACHE_BACKEND = os.getenv('ARTIFACT_CACHE_BACKEND', 'none').lower()
+ARTIFACT_CACHE_PATH = os.getenv('ARTIFACT_CACHE_PATH', os.path.join('cache', 'artifacts.sqlite3'))
+ARTIFACT_CACHE_REDIS_URL = os.getenv('ARTIFACT_CACHE_REDIS_URL', 'redis://127.0.0.1:6379/0')
+ARTIFACT_CACHE_TIMEOUT = float(os.getenv('ARTIFACT_CACHE_TIMEOUT', 0.5))
+# After this many consecutive connection failures the backend is skipped for
+# ARTIFACT_CACHE_RETRY_AFTER seconds instead of being retried on every lookup
+ARTIFACT_CACHE_FAILURE_THRESHOLD = int(os.getenv('ARTIFACT_CACHE_FAILURE_THRESHOLD', 3))
+ARTIFACT_CACHE_RETRY_AFTER = float(os.getenv('ARTIFACT_CACHE_RETRY_AFTER', 30))
+
+def artifact_version(*parts):
+    """Short hash of whatever produced an artifact (model name, prompt text, schema)."""
+    digest = hashlib.sha256("\x1f".join(str(part) for part in parts).encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+class CacheBackend:
+    """Shared key/value store for JSON-serializable artifacts.
+
+    Backends never raise on I/O problems: a failed read is a miss and a failed
+    write is dropped, so the in-process cache keeps working on its own. Repeated
+    connection failures open a circuit that skips the store for a while.
+    """
+    name = "none"
+    failures = 0
+    skipped = 0
+    _open_until = 0.0
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value, ttl=None):
+        pass
+
+    def delete(self, key):
+        pass
+
+    def clear_prefix(self, prefix):
+        """Delete every key starting with prefix (one cache namespace)."""
+        pass
+
+    def available(self):
+        if self._open_until and time.monotonic() < self._open_until:
+            self.skipped += 1
+            return False
+        return True
+
+    def _record_failure(self):
+        self.failures += 1
+        if self.failures >= ARTIFACT_CACHE_FAILURE_THRESHOLD:
+            if not self._open_until or time.monotonic() >= self._open_until:
+                print(f"Artifact cache {self.name} unavailable, skipping it for {ARTIFACT_CACHE_RETRY_AFTER}s")
+            self._open_until = time.monotonic() + ARTIFACT_CACHE_RETRY_AFTER
+
+    def _record_success(self):
+        self.failures = 0
+        self._open_until = 0.0
+
+    def _circuit_stats(self):
+        return {"circuit_open": time.monotonic() < self._open_until, "skipped": self.skipped}
+
+    def stats(self):
+        return {"backend": self.name}
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """Disk store shared by every worker process on the host."""
+    name = "sqlite"
+
+    def __init__(self, path=ARTIFACT_CACHE_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=ARTIFACT_CACHE_TIMEOUT, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS artifacts (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)"
+        )
+        self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def get(self, key):
+        if not self.available():
+            return None
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT value, expires_at FROM artifacts WHERE key = ?", (key,)
+                ).fetchone()
+            self._record_success()
+            if row is None or (row[1] is not None and row[1] < time.time()):
+                self.misses += 1
+                return None
+            self.hits += 1
+            return json.loads(row[0])
+        except sqlite3.Error as e:
+            self.errors += 1
+            self._record_failure()
+            print(f"Artifact cache read failed for {key}: {e}")
+            return None
+        except ValueError as e:
+            self.errors += 1
+            print(f"Artifact cache read failed for {key}: {e}")
+            return None
+
+    def set(self, key, value, ttl=None):
+        if not self.available():
+            return
+        expires_at = time.time() + ttl if ttl else None
+        try:
+            payload = json.dumps(value)
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO artifacts (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, payload, expires_at)
+                )
+                self._conn.commit()
+            self._record_success()
+        except sqlite3.Error as e:
+            self.errors += 1
+            self._record_failure()
+            print(f"Artifact cache write failed for {key}: {e}")
+        except (TypeError, ValueError) as e:
+            self.errors += 1
+            print(f"Artifact cache write failed for {key}: {e}")
+
+    def _execute(self, action, key, sql, params):
+        if not self.available():
+            return
+        try:
+            with self._lock:
+                self._conn.execute(sql, params)
+                self._conn.commit()
+            self._record_success()
+        except sqlite3.Error as e:
+            self.errors += 1
+            self._record_failure()
+            print(f"Artifact cache {action} failed for {key}: {e}")
+
+    def delete(self, key):
+        self._execute("delete", key, "DELETE FROM artifacts WHERE key = ?", (key,))
+
+    def clear_prefix(self, prefix):
+        self._execute("clear", prefix, "DELETE FROM artifacts WHERE substr(key, 1, ?) = ?", (len(prefix), prefix))
+
+    def stats(self):
+        return {"backend": self.name, "path": self.path, "hits": self.hits, "misses": self.misses,
+                "errors": self.errors, **self._circuit_stats()}
+
+
+class RedisCacheBackend(CacheBackend):
+    """Minimal RESP client (GET/SET EX/DEL/SCAN), compatible with Redis and local stand-ins."""
+    name = "redis"
+
+    def __init__(self, url=ARTIFACT_CACHE_REDIS_URL):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "127.0.0.1"
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self._lock = threading.Lock()
+        self._sock = None
+        self._reader = None
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def _connect(self):
+        self._sock = socket.create_connection((self.host, self.port), timeout=ARTIFACT_CACHE_TIMEOUT)
+        self._reader = self._sock.makefile("rb")
+        if self.password:
+            self._send("AUTH", self.password)
+        if self.db:
+            self._send("SELECT", self.db)
+
+    def _close(self):
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+        self._sock = None
+        self._reader = None
+
+    def _send(self, *args):
+        parts = [f"*{len(args)}\r\n".encode()]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode("utf-8")
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        self._sock.sendall(b"".join(parts))
+        return self._read_reply()
+
+    def _read_reply(self):
+        line = self._reader.readline()
+        if not line:
+            raise ConnectionError("Connection closed by cache server")
+        kind, body = line[:1], line[1:-2]
+        if kind == b"+":
+            return body.decode()
+        if kind == b"-":
+            raise RuntimeError(body.decode())
+        if kind == b":":
+            return int(body)
+        if kind == b"$":
+            length = int(body)
+            if length < 0:
+                return None
+            data = self._reader.read(length + 2)
+            return data[:-2]
+        if kind == b"*":
+            count = int(body)
+            return None if count < 0 else [self._read_reply() for _ in range(count)]
+        raise RuntimeError(f"Unexpected reply from cache server: {line!r}")
+
+    def _command(self, *args):
+        with self._lock:
+            for attempt in range(2):
+                reused = self._sock is not None
+                try:
+                    if not reused:
+                        self._connect()
+                    reply = self._send(*args)
+                    self._record_success()
+                    return reply
+                except (OSError, ConnectionError) as e:
+                    self._close()
+                    # Only a dropped idle connection is worth one immediate retry
+                    if attempt or not reused:
+                        self._record_failure()
+                        raise e
+
+    def get(self, key):
+        if not self.available():
+            return None
+        try:
+            raw = self._command("GET", key)
+            if raw is None:
+                self.misses += 1
+                return None
+            value = json.loads(raw)
+        except (OSError, ConnectionError, RuntimeError, ValueError) as e:
+            self.errors += 1
+            print(f"Artifact cache read failed for {key}: {e}")
+            return None
+        self.hits += 1
+        return value
+
+    def set(self, key, value, ttl=None):
+        if not self.available():
+            return
+        try:
+            payload = json.dumps(value)
+            if ttl:
+                self._command("SET", key, payload, "EX", int(ttl))
+            else:
+                self._command("SET", key, payload)
+        except (OSError, ConnectionError, RuntimeError, TypeError, ValueError) as e:
+            self.errors += 1
+            print(f"Artifact cache write failed for {key}: {e}")
+
+    def delete(self, key):
+        if not self.available():
+            return
+        try:
+            self._command("DEL", key)
+        except (OSError, ConnectionError, RuntimeError) as e:
+            self.errors += 1
+            print(f"Artifact cache delete failed for {key}: {e}")
+
+    def clear_prefix(self, prefix):
+        if not self.available():
+            return
+        pattern = "".join("\\" + c if c in "*?[]\\" else c for c in prefix) + "*"
+        try:
+            cursor = "0"
+            while True:
+                cursor, keys = self._command("SCAN", cursor, "MATCH", pattern, "COUNT", 500)
+                if keys:
+                    self._command("DEL", *keys)
+                cursor = cursor.decode() if isinstance(cursor, bytes) else str(cursor)
+                if cursor == "0":
+                    break
+        except (OSError, ConnectionError, RuntimeError) as e:
+            self.errors += 1
+            print(f"Artifact cache clear failed for {prefix}: {e}")
+
+    def stats(self):
+        return {"backend": self.name, "host": self.host, "port": self.port,
+                "hits": self.hits, "misses": self.misses, "errors": self.errors, **self._circuit_stats()}
+
+
+_backend = None
+
+def get_cache_backend():
+    """Return the process-wide shared cache backend selected by ARTIFACT_CACHE_BACKEND."""
+    global _backend
+    if _backend is None:
+        if ARTIFACT_CACHE_BACKEND == "sqlite":
+            _backend = SQLiteCacheBackend()
+        elif ARTIFACT_CACHE_BACKEND == "redis":
+            _backend = RedisCacheBackend()
+        else:
+            _backend = CacheBackend()
+    return _backend
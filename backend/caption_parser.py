@@ -0,0 +1,242 @@
+import codecs
+import json
+import re
+import xml.etree.ElementTree as ET
+
+# Caption formats, cheapest first: srv1/srv2 are one element per line; json3
+# and auto-generated VTT (rolling, repeated cues) are larger; srv3 wraps every
+# word in its own element and is the slowest to parse. TTML is last, for the
+# rare tracks offered in nothing else
+CAPTION_FORMAT_PREFERENCE = ("srv1", "srv2", "json3", "vtt", "srv3", "ttml")
+
+_VTT_TIMING_RE = re.compile(r"^(\S+)\s+-->\s+(\S+)")
+_VTT_TAG_RE = re.compile(r"<[^>]*>")
+
+def _caption(start, duration, text):
+    return {'start': start, 'duration': duration, 'text': text.replace('\n', ' ')}
+
+def _local_name(tag):
+    return tag.rsplit('}', 1)[-1]
+
+def _ttml_seconds(value):
+    """TTML clock time ("00:01:02.500") or offset time ("62.5s", "1500ms")."""
+    if ':' in value:
+        return _vtt_seconds(value)
+    for suffix, scale in (('ms', 0.001), ('s', 1.0), ('m', 60.0), ('h', 3600.0)):
+        if value.endswith(suffix):
+            return float(value[:-len(suffix)]) * scale
+    return float(value)
+
+def _ttml_text(elem):
+    # <br/> separates lines inside a TTML paragraph
+    parts = [elem.text or '']
+    for child in elem:
+        parts.append(' ' if _local_name(child.tag) == 'br' else "".join(child.itertext()))
+        parts.append(child.tail or '')
+    return "".join(parts)
+
+def _vtt_seconds(value):
+    parts = value.replace(',', '.').split(':')
+    seconds = 0.0
+    for part in parts:
+        seconds = seconds * 60 + float(part)
+    # Clock times carry millisecond precision; drop float noise from the sum
+    return round(seconds, 3)
+
+
+class XMLCaptionParser:
+    """srv1 (<text start= dur=>), srv2 (<text t= d=> in ms), srv3 (<p t= d=>
+    in ms, words in <s>) and TTML (<p begin= end=>), parsed with a pull parser
+    as bytes arrive. Each cue element is detached from its parent once handled,
+    so the tree never holds more than the cue being parsed."""
+
+    def __init__(self):
+        self._parser = ET.XMLPullParser(events=("start", "end"))
+        self._open = []
+        self.captions = []
+
+    def _handle(self, elem):
+        tag = _local_name(elem.tag)
+        if tag == 'text':
+            if 'start' in elem.attrib:
+                start = float(elem.attrib['start'])
+                duration = float(elem.attrib.get('dur', 0))
+            else:
+                start = int(elem.attrib.get('t', 0)) / 1000
+                duration = int(elem.attrib.get('d', 0)) / 1000
+        elif tag == 'p' and 'begin' in elem.attrib:
+            start = _ttml_seconds(elem.attrib['begin'])
+            if 'end' in elem.attrib:
+                duration = _ttml_seconds(elem.attrib['end']) - start
+            else:
+                duration = _ttml_seconds(elem.attrib.get('dur', '0'))
+            text = _ttml_text(elem)
+            if text.strip():
+                self.captions.append(_caption(start, round(max(duration, 0.0), 3), text))
+            return True
+        elif tag == 'p':
+            start = int(elem.attrib.get('t', 0)) / 1000
+            duration = int(elem.attrib.get('d', 0)) / 1000
+        else:
+            return False
+        text = "".join(elem.itertext())
+        if text.strip():
+            self.captions.append(_caption(start, duration, text))
+        return True
+
+    def _drain(self):
+        for event, elem in self._parser.read_events():
+            if event == "start":
+                self._open.append(elem)
+                continue
+            self._open.pop()
+            if self._handle(elem) and self._open:
+                self._open[-1].remove(elem)
+
+    def feed(self, data):
+        self._parser.feed(data)
+        self._drain()
+
+    def close(self):
+        self._parser.close()
+        self._drain()
+        return self.captions
+
+
+class JSON3CaptionParser:
+    """json3 ({"events": [{"tStartMs", "dDurationMs", "segs": [{"utf8"}]}]}),
+    decoding one event object at a time as soon as it is complete."""
+
+    def __init__(self):
+        self._decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self._json = json.JSONDecoder()
+        self._buffer = ""
+        self._in_events = False
+        self._done = False
+        self.captions = []
+
+    def _handle(self, event):
+        segs = event.get('segs')
+        if not segs or 'tStartMs' not in event:
+            return
+        text = "".join(seg.get('utf8', '') for seg in segs)
+        if text.strip():
+            self.captions.append(_caption(event['tStartMs'] / 1000, event.get('dDurationMs', 0) / 1000, text))
+
+    def _drain(self):
+        buffer = self._buffer
+        pos = 0
+        if not self._in_events:
+            start = buffer.find('"events"')
+            bracket = buffer.find('[', start) if start != -1 else -1
+            if bracket == -1:
+                return
+            self._in_events = True
+            pos = bracket + 1
+        while not self._done:
+            while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+                pos += 1
+            if pos >= len(buffer):
+                break
+            if buffer[pos] == ']':
+                self._done = True
+                break
+            try:
+                event, end = self._json.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                # Event not fully received yet
+                break
+            self._handle(event)
+            pos = end
+        self._buffer = buffer[pos:]
+
+    def feed(self, data):
+        if self._done:
+            return
+        self._buffer += self._decoder.decode(data)
+        self._drain()
+
+    def close(self):
+        self._buffer += self._decoder.decode(b'', final=True)
+        self._drain()
+        return self.captions
+
+
+class VTTCaptionParser:
+    """WebVTT, streamed line by line. Inline tags are stripped and the rolling
+    lines repeated by auto-generated cues are emitted once."""
+
+    def __init__(self):
+        self._decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self._pending = ""
+        self._cue = None
+        self._last_line = None
+        self.captions = []
+
+    def _flush_cue(self):
+        if self._cue is None:
+            return
+        start, end, lines = self._cue
+        self._cue = None
+        fresh = []
+        for line in lines:
+            if line != self._last_line:
+                fresh.append(line)
+                self._last_line = line
+        if fresh:
+            self.captions.append(_caption(start, round(max(end - start, 0.0), 3), " ".join(fresh)))
+
+    def _line(self, line):
+        line = line.rstrip('\r')
+        timing = _VTT_TIMING_RE.match(line)
+        if timing:
+            self._flush_cue()
+            try:
+                self._cue = (_vtt_seconds(timing.group(1)), _vtt_seconds(timing.group(2)), [])
+            except ValueError:
+                self._cue = None
+        elif not line:
+            # Only an empty line ends a cue; auto-generated tracks use " " as a blank placeholder line
+            self._flush_cue()
+        elif self._cue is not None:
+            text = _VTT_TAG_RE.sub('', line).strip()
+            if text:
+                self._cue[2].append(text)
+
+    def feed(self, data):
+        self._pending += self._decoder.decode(data)
+        *lines, self._pending = self._pending.split('\n')
+        for line in lines:
+            self._line(line)
+
+    def close(self):
+        self._pending += self._decoder.decode(b'', final=True)
+        if self._pending:
+            self._line(self._pending)
+            self._pending = ""
+        self._flush_cue()
+        return self.captions
+
+
+def get_caption_parser(ext):
+    """Incremental parser for a caption track extension."""
+    if ext == 'json3':
+        return JSON3CaptionParser()
+    if ext == 'vtt':
+        return VTTCaptionParser()
+    # srv1/srv2/srv3 and the legacy <transcript><text> format
+    return XMLCaptionParser()
+
+def parse_caption_stream(chunks, ext):
+    """Parse an iterable of byte chunks into [{'start', 'duration', 'text'}]."""
+    parser = get_caption_parser(ext)
+    for chunk in chunks:
+        parser.feed(chunk)
+    return parser.close()
+
+def pick_caption_track(tracks):
+    """Cheapest supported track by CAPTION_FORMAT_PREFERENCE, or None."""
+    ranked = [track for track in tracks if track.get('ext') in CAPTION_FORMAT_PREFERENCE and track.get('url')]
+    if not ranked:
+        return None
+    return min(ranked, key=lambda track: CAPTION_FORMAT_PREFERENCE.index(track['ext']))
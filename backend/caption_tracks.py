@@ -0,0 +1,124 @@
+import os
+import time
+from urllib.parse import urlparse, parse_qs
+import yt_dlp
+import dotenv
+from ttl_cache import TTLCache
+from caption_parser import pick_caption_track
+dotenv.load_dotenv()
+
+# Resolved caption track lists per video. Track URLs are signed and carry an
+# `expire` timestamp, so an entry is dropped early once its URLs are about to lapse.
+CAPTION_TRACKS_TTL = float(os.getenv('CAPTION_TRACKS_TTL', 3 * 3600))
+CAPTION_URL_EXPIRY_MARGIN = float(os.getenv('CAPTION_URL_EXPIRY_MARGIN', 300))
+CAPTION_HTTP_TIMEOUT = float(os.getenv('TRANSCRIPT_HTTP_TIMEOUT', 15))
+
+track_cache = TTLCache(
+    max_entries=int(os.getenv('CAPTION_TRACKS_MAX_ENTRIES', 2048)),
+    ttl=CAPTION_TRACKS_TTL,
+)
+_stats = {"extractions": 0, "cache_hits": 0, "expired": 0, "invalidations": 0}
+
+def _url_expiry(url):
+    try:
+        expire = parse_qs(urlparse(url).query).get('expire')
+        return float(expire[0]) if expire else None
+    except (ValueError, TypeError):
+        return None
+
+def tracks_from_info(info_dict):
+    """Reduce a yt-dlp info_dict to {"tracks": {lang: [track, ...]}, "expires_at": ts}.
+
+    Manual subtitles come before automatic captions for the same language.
+    expires_at is the earliest `expire` found in the track URLs, or None.
+    """
+    tracks = {}
+    expiries = []
+    for source, automatic in (('subtitles', False), ('automatic_captions', True)):
+        for lang, lang_tracks in (info_dict.get(source) or {}).items():
+            for track in lang_tracks:
+                url = track.get('url')
+                if not url:
+                    continue
+                tracks.setdefault(lang, []).append({
+                    'ext': track.get('ext'),
+                    'url': url,
+                    'name': track.get('name'),
+                    'automatic': automatic,
+                })
+                expiry = _url_expiry(url)
+                if expiry is not None:
+                    expiries.append(expiry)
+    return {"tracks": tracks, "expires_at": min(expiries) if expiries else None}
+
+# YoutubeIE still fetches the player responses (that is where caption tracks
+# come from) and builds the progressive format list from them. These arguments
+# drop the rest: HLS/DASH manifest downloads, the player JS needed only to
+# decipher format URLs, per-client config pages and the /next initial data
+CAPTION_EXTRACTOR_ARGS = {
+    'youtube': {
+        'skip': ['hls', 'dash'],
+        'player_skip': ['configs', 'js', 'initial_data'],
+    },
+}
+
+def extract_caption_info(video_id):
+    """Run yt-dlp for subtitle metadata. process=False skips yt-dlp's format
+    selection and sorting; CAPTION_EXTRACTOR_ARGS trims the extractor itself."""
+    ydl_opts = {
+        'skip_download': True,
+        'quiet': True,
+        'no_warnings': True,
+        'log_warnings': False,
+        'socket_timeout': CAPTION_HTTP_TIMEOUT,
+        'extractor_args': CAPTION_EXTRACTOR_ARGS,
+    }
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        return ydl.extract_info(f"https://www.youtube.com/watch?v={video_id}", download=False, process=False)
+
+def cache_caption_tracks(video_id, info_dict):
+    """Resolve and cache tracks from an info_dict (also used to seed fixtures)."""
+    resolved = tracks_from_info(info_dict)
+    track_cache.set(video_id, resolved)
+    return resolved
+
+def resolve_caption_tracks(video_id, extract=extract_caption_info):
+    """Caption tracks for a video, extracting with yt-dlp only on a cache miss
+    or when the cached track URLs are about to expire."""
+    resolved = track_cache.get(video_id)
+    if resolved is not None:
+        expires_at = resolved["expires_at"]
+        if expires_at is None or expires_at - CAPTION_URL_EXPIRY_MARGIN > time.time():
+            _stats["cache_hits"] += 1
+            return resolved
+        _stats["expired"] += 1
+        track_cache.pop(video_id)
+
+    _stats["extractions"] += 1
+    return cache_caption_tracks(video_id, extract(video_id))
+
+def invalidate_caption_tracks(video_id):
+    """Forget cached tracks, e.g. after a track URL was rejected."""
+    if track_cache.pop(video_id) is not None:
+        _stats["invalidations"] += 1
+
+def choose_caption_track(tracks, preferred_langs=('en-orig', 'en')):
+    """(lang, track) for the cheapest track in the first preferred language
+    that has one, else in any other non-live-chat language; (None, None) if none."""
+    for lang in preferred_langs:
+        track = pick_caption_track(tracks.get(lang, []))
+        if track:
+            return lang, track
+    for lang, lang_tracks in tracks.items():
+        if 'live_chat' in lang or lang in preferred_langs:
+            continue
+        track = pick_caption_track(lang_tracks)
+        if track:
+            return lang, track
+    return None, None
+
+def get_caption_track_stats():
+    """Get extraction and cache counters for caption track resolution."""
+    stats = dict(_stats)
+    stats["cache"] = track_cache.stats()
+    return stats
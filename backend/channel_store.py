@@ -0,0 +1,53 @@
+import os
+import dotenv
+from ttl_cache import TTLCache
+from youtube_api import fetch_channels_by_ids
+dotenv.load_dotenv()
+
+# Channel metadata (subscriber counts, thumbnails) changes slowly, so it is shared
+# by every search and video-detail lookup for CHANNEL_CACHE_TTL seconds.
+channel_cache = TTLCache(
+    max_entries=int(os.getenv('CHANNEL_CACHE_MAX_ENTRIES', 4096)),
+    ttl=float(os.getenv('CHANNEL_CACHE_TTL', 6 * 3600)),
+)
+# Channels the API reported as missing are remembered for a shorter time
+missing_channel_cache = TTLCache(
+    max_entries=int(os.getenv('CHANNEL_CACHE_MAX_ENTRIES', 4096)),
+    ttl=float(os.getenv('CHANNEL_NEGATIVE_TTL', 600)),
+)
+
+async def get_channels(channel_ids):
+    """Return a dict of channel id -> channels.list item, fetching only uncached ids in batches."""
+    channels = {}
+    to_fetch = []
+    for channel_id in dict.fromkeys(channel_ids):
+        if not channel_id:
+            continue
+        channel = channel_cache.get(channel_id)
+        if channel is not None:
+            channels[channel_id] = channel
+        elif missing_channel_cache.get(channel_id) is None:
+            to_fetch.append(channel_id)
+
+    if to_fetch:
+        failed_ids = set()
+        fetched = await fetch_channels_by_ids(to_fetch, failed_ids)
+        for channel_id in to_fetch:
+            if channel_id in fetched:
+                channel_cache.set(channel_id, fetched[channel_id])
+                channels[channel_id] = fetched[channel_id]
+            elif channel_id not in failed_ids:
+                missing_channel_cache.set(channel_id, True)
+    return channels
+
+async def get_channel(channel_id):
+    """Return the channels.list item for one channel, or None if it does not exist."""
+    channels = await get_channels([channel_id])
+    return channels.get(channel_id)
+
+def get_channel_cache_stats():
+    """Get statistics about the channel metadata cache."""
+    stats = channel_cache.stats()
+    stats["missing_entries"] = len(missing_channel_cache)
+    stats["missing_hits"] = missing_channel_cache.hits
+    return stats
@@ -1,11 +1,22 @@
 from langchain.vectorstores import FAISS
-from langchain_google_genai import GoogleGenerativeAIEmbeddings, ChatGoogleGenerativeAI
+from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain.schema import Document
 from langchain.chains import RetrievalQA
 from langchain.chains.summarize import load_summarize_chain
 from langchain.prompts import PromptTemplate
-import aiohttp
-import re
+from http_client import get_session
+from youtube_api import fetch_video_by_id
+from singleflight import single_flight
+from llm_runtime import run_chain
+from artifact_cache import ArtifactCache
+from cache_backends import get_cache_backend, artifact_version
+from embedding_service import build_embeddings
+from vector_index import index_path, load_vectorstore, save_vectorstore, remove_vectorstores
+from channel_store import get_channel
+from comment_filter import filter_comments
+from comment_dedup import NearDuplicateIndex, record_reduction
+from comment_selection import select_comments
+import asyncio
 import os
 import dotenv
 dotenv.load_dotenv()
@@ -25,43 +36,128 @@ llm = ChatGoogleGenerativeAI(
     max_output_tokens=2048
 )
 
-# Enhanced cache structure
-cache = {}
+# Comment ingestion limits; every commentThreads/comments page costs 1 quota unit
+COMMENT_PAGE_SIZE = 100
+COMMENT_MAX_COMMENTS = int(os.getenv('COMMENT_MAX_COMMENTS', 1000))
+COMMENT_PAGE_BUDGET = int(os.getenv('COMMENT_PAGE_BUDGET', 15))
+COMMENT_INCLUDE_REPLIES = os.getenv('COMMENT_INCLUDE_REPLIES', 'false').lower() == 'true'
 
-async def fetch_comments_data(video_id, max_results=100, order="relevance"):
-    url = f"{BASE_URL}/commentThreads?part=snippet&videoId={video_id}&key={API_KEY_COMMENTS}&maxResults={max_results}&order={order}"
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url) as response:
-            if response.status == 200:
-                return await response.json()
-            return None
+async def fetch_comments_data(video_id, max_results=100, order="relevance", page_token=None, part="snippet"):
+    return await single_flight(
+        f"comment_threads:{video_id}:{order}:{max_results}:{part}:{page_token or ''}",
+        lambda: _fetch_comments_data(video_id, max_results, order, page_token, part)
+    )
+
+async def _fetch_comments_data(video_id, max_results, order, page_token, part):
+    url = f"{BASE_URL}/commentThreads?part={part}&videoId={video_id}&key={API_KEY_COMMENTS}&maxResults={max_results}&order={order}"
+    if page_token:
+        url += f"&pageToken={page_token}"
+    session = get_session()
+    async with session.get(url) as response:
+        if response.status == 200:
+            return await response.json()
+        return None
+
+async def fetch_replies_data(parent_id, page_token=None):
+    url = f"{BASE_URL}/comments?part=snippet&parentId={parent_id}&key={API_KEY_COMMENTS}&maxResults={COMMENT_PAGE_SIZE}"
+    if page_token:
+        url += f"&pageToken={page_token}"
+    session = get_session()
+    async with session.get(url) as response:
+        if response.status == 200:
+            return await response.json()
+        return None
+
+def comment_record(comment, sort_by, parent_id=None):
+    snippet = comment["snippet"]
+    return {
+        "CommentId": comment["id"],
+        "ParentId": parent_id,
+        "Author": snippet["authorDisplayName"],
+        "CommentText": snippet["textOriginal"],
+        "LikeCount": snippet["likeCount"],
+        "PublishDate": snippet["publishedAt"],
+        "AuthorLogoUrl": snippet["authorProfileImageUrl"],
+        "SortBy": sort_by
+    }
+
+async def _fetch_all_replies(parent_id, budget):
+    replies = []
+    page_token = None
+    while budget["pages"] > 0:
+        budget["pages"] -= 1
+        data = await fetch_replies_data(parent_id, page_token)
+        if not data or "items" not in data:
+            break
+        replies.extend(data["items"])
+        page_token = data.get("nextPageToken")
+        if not page_token:
+            break
+    return replies
+
+async def iter_comment_batches(video_id, order="relevance", max_comments=COMMENT_MAX_COMMENTS,
+                               budget=None, include_replies=COMMENT_INCLUDE_REPLIES, seen=None):
+    """Async generator over a video's comments, one page-sized batch at a time.
+
+    Follows nextPageToken until max_comments are yielded or the shared page
+    budget ({"pages": n}) runs out. Comments already in `seen` are skipped, so
+    several orders can share one dedupe set.
+    """
+    seen = set() if seen is None else seen
+    budget = {"pages": COMMENT_PAGE_BUDGET} if budget is None else budget
+    part = "snippet,replies" if include_replies else "snippet"
+    yielded = 0
+    page_token = None
+    while yielded < max_comments and budget["pages"] > 0:
+        budget["pages"] -= 1
+        data = await fetch_comments_data(video_id, COMMENT_PAGE_SIZE, order, page_token, part)
+        if not data or "items" not in data:
+            break
+
+        batch = []
+        for item in data["items"]:
+            top_comment = item["snippet"]["topLevelComment"]
+            if top_comment["id"] not in seen:
+                seen.add(top_comment["id"])
+                batch.append(comment_record(top_comment, order))
+            if include_replies:
+                replies = item.get("replies", {}).get("comments", [])
+                # Inline replies are capped at 5; page through the rest if the budget allows
+                if item["snippet"].get("totalReplyCount", 0) > len(replies):
+                    replies = await _fetch_all_replies(top_comment["id"], budget) or replies
+                for reply in replies:
+                    if reply["id"] not in seen:
+                        seen.add(reply["id"])
+                        batch.append(comment_record(reply, order, parent_id=top_comment["id"]))
+
+        batch = batch[:max_comments - yielded]
+        if batch:
+            yielded += len(batch)
+            yield batch
+        page_token = data.get("nextPageToken")
+        if not page_token:
+            break
 
 async def fetch_channel_details(channel_id):
-    url = f"{BASE_URL}/channels?part=snippet%2CcontentDetails%2Cstatistics&id={channel_id}&key={API_KEY_VIDEO}"
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url) as response:
-            if response.status == 200:
-                result = await response.json()
-                if result["items"]:
-                    return result["items"][0].get("statistics", {})
-            return {}
+    channel = await get_channel(channel_id)
+    if channel:
+        return channel.get("statistics", {})
+    return {}
 
 async def fetch_video_details(video_id):
-    video_details_url = f"{BASE_URL}/videos?part=snippet,statistics,contentDetails&id={video_id}&key={API_KEY_VIDEO}"
-    async with aiohttp.ClientSession() as session:
-        async with session.get(video_details_url) as response:
-            if response.status == 200:
-                result = await response.json()
-                if result["items"]:
-                    video_details = result["items"][0]
-                    return video_details
-            return None
+    return await fetch_video_by_id(video_id)
 
 async def extract_comments(video_id):
+    # Pull any copies other workers shared before deciding to fetch
+    await cache.prefetch(video_id)
     if video_id in cache and "Comments" in cache[video_id]:
         print(f"Using cached comments for video ID: {video_id}")
         return cache[video_id]["Comments"]
 
+    # Concurrent requests for the same video share one fetch
+    return await single_flight(f"comments:{video_id}", lambda: _extract_comments(video_id))
+
+async def _extract_comments(video_id):
     video = await fetch_video_details(video_id)
     if not video:
         return []
@@ -69,100 +165,140 @@ async def extract_comments(video_id):
     com_cnt = int(video['statistics']['commentCount']) if 'commentCount' in video['statistics'] else 0
     
     all_comments = []
-
-    # Fetch comments by relevance
-    if com_cnt > 0:
-        com_data_rel = await fetch_comments_data(video_id, min(100, com_cnt), "relevance")
-        if com_data_rel and "items" in com_data_rel:
-            for item in com_data_rel["items"]:
-                snippet = item["snippet"]["topLevelComment"]["snippet"]
-                all_comments.append({
-                    "Author": snippet["authorDisplayName"],
-                    "CommentText": snippet["textOriginal"],
-                    "LikeCount": snippet["likeCount"],
-                    "PublishDate": snippet["publishedAt"],
-                    "AuthorLogoUrl": snippet["authorProfileImageUrl"],
-                    "SortBy": "relevance"
-                })
-
-    # Fetch additional comments by time if needed
-    if com_cnt > 100:
-        remaining_comments = com_cnt - len(all_comments)
-        if remaining_comments > 0:
-            com_data_time = await fetch_comments_data(video_id, min(100, remaining_comments), "time")
-            if com_data_time and "items" in com_data_time:
-                for item in com_data_time["items"]:
-                    snippet = item["snippet"]["topLevelComment"]["snippet"]
-                    all_comments.append({
-                        "Author": snippet["authorDisplayName"],
-                        "CommentText": snippet["textOriginal"],
-                        "LikeCount": snippet["likeCount"],
-                        "PublishDate": snippet["publishedAt"],
-                        "AuthorLogoUrl": snippet["authorProfileImageUrl"],
-                        "SortBy": "time"
-                    })
+    dedup_index = NearDuplicateIndex()
+    seen = set()
+    budget = {"pages": COMMENT_PAGE_BUDGET}
+    max_comments = min(com_cnt, COMMENT_MAX_COMMENTS)
+
+    # Relevance first (up to half the cap), then fill the rest with the newest comments.
+    # Each batch is cleaned and fed to the near-duplicate index as it arrives.
+    relevance_cap = max(COMMENT_PAGE_SIZE, max_comments // 2)
+    for order in ("relevance", "time"):
+        remaining = max_comments - len(all_comments)
+        if remaining <= 0:
+            break
+        cap = min(relevance_cap, remaining) if order == "relevance" else remaining
+        async for batch in iter_comment_batches(video_id, order, cap, budget, seen=seen):
+            all_comments.extend(batch)
+            collapse_comments(batch, dedup_index)
 
     # Initialize cache structure for this video
     if video_id not in cache:
         cache[video_id] = {}
     cache[video_id]["Comments"] = all_comments
+    cache[video_id]["ProcessedComments"] = render_collapsed(dedup_index)
+    cache[video_id]["ProcessedCommentMeta"] = comment_meta(dedup_index)
+    cache[video_id]["DedupIndex"] = dedup_index
     return all_comments
 
-def remove_links(comment):
-    return re.sub(r'https?://\S+|www\.\S+', '', comment).strip()
-
-def has_multiple_timestamps(comment):
-    timestamps = re.findall(r'\d{1,2}(:\d{2}){1,3}', comment)
-    return len(timestamps) > 3
-
-def has_char_timestamps(comment):
-    pattern = r'^\s*\d{1,2}(:\d{2}){1,3}[\s\u200B]*[-:|]*[\s\u200B]+[a-zA-Z]{2,}.*$'
-    matches = re.findall(pattern, comment, flags=re.MULTILINE)
-    return len(matches) > 3
-
-def is_code_heavy(comment):
-    comment = comment.strip()
-    high_signal_keywords = re.findall(
-        r'\b(def|class|return|import|lambda|function|const|var|=>|try|except|elif)\b',
-        comment
-    )
-    code_structures = re.findall(r'(==|===|{|}|\[|\]|::|->|=)', comment)
-    indented_lines = re.findall(r'^\s{4,}', comment, re.MULTILINE)
-    num_lines = comment.count('\n') + 1
-    score = 0
-    if len(high_signal_keywords) >= 2:
-        score += 2
-    if len(code_structures) >= 3:
-        score += 2
-    if len(indented_lines) >= 2:
-        score += 2
-    if num_lines >= 3:
-        score += 1
-    if len(high_signal_keywords) > 0 and len(code_structures) > 0:
-        score += 1
-    return score >= 5
-
-def clean_and_filter_comment(comment):
-    comment = remove_links(comment)
-    if is_code_heavy(comment):
-        return None
-    if has_multiple_timestamps(comment) and not has_char_timestamps(comment):
-        return None
-    if len(comment.strip()) == 0:
-        return None
-    return comment.strip()
+async def refresh_comments(video_id):
+    """Fetch only comments newer than the cached ones and fold them into the
+    cached comments, processed comments, vectorstore and pending summary delta."""
+    await cache.prefetch(video_id)
+    if video_id not in cache or "Comments" not in cache[video_id]:
+        comments = await extract_comments(video_id)
+        return {"new_comments": len(comments), "full_fetch": True}
+    return await single_flight(f"comment_refresh:{video_id}", lambda: _refresh_comments(video_id))
+
+async def _refresh_comments(video_id):
+    entry = cache[video_id]
+    cached_comments = entry["Comments"]
+    latest = max((comment["PublishDate"] for comment in cached_comments), default="")
+    cached_ids = {comment["CommentId"] for comment in cached_comments if comment.get("CommentId")}
+
+    # order=time is newest first, so stop at the first page that reaches cached history
+    # (an older or already cached comment). Cached comments are filtered here rather
+    # than via `seen`: a page of only cached comments would otherwise come back
+    # empty and never be yielded. Comments posted in the same second as the newest
+    # cached one are new unless their id is cached.
+    new_comments = []
+    async for batch in iter_comment_batches(video_id, "time", COMMENT_MAX_COMMENTS):
+        fresh = [comment for comment in batch
+                 if comment["PublishDate"] >= latest and comment["CommentId"] not in cached_ids]
+        new_comments.extend(fresh)
+        if len(fresh) < len(batch):
+            break
+    if not new_comments:
+        return {"new_comments": 0, "full_fetch": False}
+
+    # Collapse against everything already processed, so a new comment that
+    # repeats an earlier one only adds to that representative's counts
+    dedup_index = entry.get("DedupIndex")
+    if dedup_index is None:
+        # Rebuilding in the original order reproduces ProcessedComments' groups
+        dedup_index = await asyncio.to_thread(collapse_comments, cached_comments)
+    known_groups = len(dedup_index.groups)
+    collapse_comments(new_comments, dedup_index)
+    new_cleaned = dedup_index.render(known_groups)
+    print(f"Refresh for video ID {video_id}: {len(new_comments)} new comments, "
+          f"{len(new_cleaned)} not similar to earlier ones")
+    entry["Comments"] = cached_comments + new_comments
+    entry["DedupIndex"] = dedup_index
+    if "ProcessedComments" in entry:
+        # Appending keeps earlier chunk boundaries stable for the embedding cache
+        entry["ProcessedComments"] = entry["ProcessedComments"] + new_cleaned
+        # Likes of earlier representatives may have grown too
+        entry["ProcessedCommentMeta"] = comment_meta(dedup_index)
+
+    if new_cleaned:
+        if "Summary" in entry:
+            # The group lets the summary update read the representative's current likes
+            pending = [{"text": text, "group": known_groups + i, **meta}
+                       for i, (text, meta) in enumerate(zip(new_cleaned, comment_meta(dedup_index)[known_groups:]))]
+            entry["PendingComments"] = entry.get("PendingComments", []) + pending
+        if "Vectorstore" in entry:
+            vectorstore = entry["Vectorstore"]
+            try:
+                await vectorstore.aadd_documents(chunk_comments(new_cleaned))
+                entry["Vectorstore"] = vectorstore
+                if "ProcessedComments" in entry:
+                    # Replaces the saved pre-refresh index for this video
+                    path = comment_index_path(video_id, entry["ProcessedComments"])
+                    await asyncio.to_thread(save_vectorstore, vectorstore, path)
+            except Exception as e:
+                # Rebuilt on the next question
+                print(f"Could not extend vectorstore for video ID {video_id}, dropping it: {e}")
+                del entry["Vectorstore"]
+
+    return {
+        "new_comments": len(new_comments),
+        "new_processed_comments": len(new_cleaned),
+        "summary_stale": "PendingComments" in entry,
+        "full_fetch": False
+    }
 
 def process_comments(comment_list):
-    cleaned_comments = []
-    for comment in comment_list:
-        cleaned = clean_and_filter_comment(comment)
-        if cleaned:
-            cleaned_comments.append(cleaned)
-    return cleaned_comments
+    # Precompiled, short-circuiting filters
+    return filter_comments(comment_list)
 
 def format_comment(comment):
     return f"{comment['Author']}: {comment['CommentText']} (Likes: {comment['LikeCount']})"
 
+def collapse_comments(comments, index=None):
+    """Clean comments and merge near-duplicates (spam, "first!", repeated jokes)
+    into one representative each, summing their likes."""
+    index = NearDuplicateIndex() if index is None else index
+    comments = list(comments)
+    cleaned = filter_comments([format_comment(comment) for comment in comments], keep_dropped=True)
+    for comment, text in zip(comments, cleaned):
+        if text:
+            index.add(comment["CommentText"], text, comment["LikeCount"], comment["PublishDate"])
+    return index
+
+def comment_meta(index):
+    """Combined likes and latest publish date per processed comment, in
+    ProcessedComments order, for token-budgeted selection."""
+    return [{"likes": group["likes"], "published": group["published"]} for group in index.groups]
+
+def render_collapsed(index):
+    processed = index.render()
+    stats = index.stats(processed)
+    record_reduction(stats)
+    if stats["collapsed_comments"]:
+        print(f"Collapsed {stats['collapsed_comments']} near-duplicate comments "
+              f"(~{stats['estimated_input_tokens']} -> ~{stats['estimated_output_tokens']} tokens)")
+    return processed
+
 custom_prompt = PromptTemplate(
     input_variables=["text"],
     template="""
@@ -195,7 +331,37 @@ Summary:
 """
 )
 
-def chunk_comments(comments, chunk_size=20):
+# Enhanced cache structure: memory-bounded, LRU by video, per-artifact TTLs (seconds)
+COMMENT_CACHE_MAX_BYTES = int(os.getenv('COMMENT_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+COMMENT_ARTIFACT_TTLS = {
+    "Comments": 6 * 3600,
+    "ProcessedComments": 6 * 3600,
+    "ProcessedCommentMeta": 6 * 3600,
+    "DedupIndex": 6 * 3600,
+    "Summary": 24 * 3600,
+    "PendingComments": 24 * 3600,
+    "SummaryInput": 24 * 3600,
+    "Vectorstore": 24 * 3600,
+}
+# Artifacts shared with other workers through the L2 backend, versioned by
+# schema, model and prompt so replicas never reuse incompatible entries
+COMMENT_ARTIFACT_VERSIONS = {
+    "Comments": artifact_version("comments", 2),
+    "ProcessedComments": artifact_version("processed_comments", 3),
+    "ProcessedCommentMeta": artifact_version("processed_comment_meta", 1),
+    "Summary": artifact_version(llm.model, custom_prompt.template),
+}
+cache = ArtifactCache(
+    max_bytes=COMMENT_CACHE_MAX_BYTES,
+    artifact_ttls=COMMENT_ARTIFACT_TTLS,
+    backend=get_cache_backend(),
+    namespace="comments",
+    versions=COMMENT_ARTIFACT_VERSIONS,
+)
+
+COMMENT_CHUNK_SIZE = 20
+
+def chunk_comments(comments, chunk_size=COMMENT_CHUNK_SIZE):
     chunks = []
     for i in range(0, len(comments), chunk_size):
         chunk = comments[i:i + chunk_size]
@@ -203,11 +369,29 @@ def chunk_comments(comments, chunk_size=20):
             chunks.append(Document(page_content="\n".join(chunk)))
     return chunks
 
-embedding_model = GoogleGenerativeAIEmbeddings(
-    google_api_key=GOOGLE_API_KEY,
-    model=embed_model
-)
+# Cached, batched embedding stack; EMBEDDING_PROVIDER=local swaps in the offline embedder
+embedding_model = build_embeddings(embed_model, google_api_key=GOOGLE_API_KEY)
+
+
+def get_summary_update_prompt(summary):
+    update_prompt = PromptTemplate(
+        input_variables=["text"],
+        template=f"""
+IMPORTANT: Keep your entire response under 1000 tokens. Be concise.
+
+You previously summarized a YouTube comment section as follows:
+{summary}
 
+New comments have been posted since then. Update the summary so it reflects them as well,
+keeping the exact same format and sections. Only change what the new comments add, contradict or reinforce.
+
+New comments, with author names starting with @:
+{{text}}
+
+Updated Summary:
+"""
+    )
+    return update_prompt
 
 def get_qa_prompt(summary):
     qa_prompt = PromptTemplate(
@@ -251,19 +435,29 @@ def ensure_processed_comments(video_id):
     if not comments:
         return []
     
-    # Process and cache the formatted/cleaned comments
-    formatted_comments = [format_comment(comment) for comment in comments]
-    cleaned_comments = process_comments(formatted_comments)
+    # Process and cache the formatted/cleaned comments, near-duplicates collapsed
+    dedup_index = collapse_comments(comments)
+    cleaned_comments = render_collapsed(dedup_index)
     
     cache[video_id]["ProcessedComments"] = cleaned_comments
+    cache[video_id]["ProcessedCommentMeta"] = comment_meta(dedup_index)
+    cache[video_id]["DedupIndex"] = dedup_index
     return cleaned_comments
 
 async def summarize_comments(video_id):
+    await cache.prefetch(video_id)
     # Check if summary is already cached
     if video_id in cache and "Summary" in cache[video_id]:
+        if cache[video_id].get("PendingComments"):
+            # Refreshed comments arrived since the summary; fold them in cheaply
+            return await single_flight(f"comment_summary_delta:{video_id}", lambda: _update_comment_summary(video_id))
         print(f"Using cached summary for video ID: {video_id}")
         return cache[video_id]["Summary"]
-    
+
+    # Concurrent callers wait for a single summary build
+    return await single_flight(f"comment_summary:{video_id}", lambda: _summarize_comments(video_id))
+
+async def _summarize_comments(video_id):
     # Ensure we have comments (will fetch if not cached)
     if video_id not in cache or "Comments" not in cache[video_id]:
         comments = await extract_comments(video_id)
@@ -275,8 +469,18 @@ async def summarize_comments(video_id):
     if not cleaned_comments:
         return {"error": "No valid comments found after cleaning."}
     
+    # Pack the prompt up to the token budget: liked, recent and varied comments first,
+    # using the likes/dates recorded when the comments were collapsed
+    meta = cache[video_id].get("ProcessedCommentMeta")
+    if meta is None or len(meta) != len(cleaned_comments):
+        meta = [{"likes": 0, "published": ""}] * len(cleaned_comments)
+    items = [{"text": comment, **info} for comment, info in zip(cleaned_comments, meta)]
+    selected, selection = select_comments(items)
+    print(f"Summarizing {selection['comments_included']}/{selection['comments_available']} comments "
+          f"(~{selection['tokens_included']}/{selection['tokens_available']} tokens) for video ID: {video_id}")
+
     # Create summary
-    comment_text = "\n\n".join(cleaned_comments)
+    comment_text = "\n\n".join(selected)
     all_comments_docs = Document(page_content=comment_text)
 
     summary_chain = load_summarize_chain(
@@ -285,16 +489,81 @@ async def summarize_comments(video_id):
         prompt=custom_prompt
     )
     
-    response = summary_chain.invoke([all_comments_docs])
+    response = await run_chain(summary_chain, [all_comments_docs])
     summary = response['output_text'].strip()
     if not summary:
         return {"error": "Comment Summary generation failed or returned empty."}
     
     # Cache the summary
-    cache[video_id]["Summary"] = summary
+    cache.setdefault(video_id, {})["Summary"] = summary
+    cache[video_id]["SummaryInput"] = selection
     return summary
 
+async def _update_comment_summary(video_id):
+    entry = cache[video_id]
+    summary = entry["Summary"]
+    pending = entry.get("PendingComments", [])
+    if not pending:
+        return summary
+
+    update_chain = load_summarize_chain(
+        llm=llm,
+        chain_type="stuff",
+        prompt=get_summary_update_prompt(summary)
+    )
+    # Likes may have grown since the refresh if later comments collapsed into these
+    groups = entry["DedupIndex"].groups if "DedupIndex" in entry else []
+    items = []
+    for item in pending:
+        group = groups[item["group"]] if item["group"] < len(groups) else item
+        items.append({"text": item["text"], "likes": group["likes"], "published": group["published"]})
+    selected, selection = select_comments(items)
+    try:
+        response = await run_chain(update_chain, [Document(page_content="\n\n".join(selected))])
+    except Exception as e:
+        print(f"Error updating comment summary, serving previous summary: {e}")
+        return summary
+    updated = response['output_text'].strip()
+    if not updated:
+        return summary
+
+    entry["Summary"] = updated
+    entry["SummaryInput"] = dict(selection, delta_update=True)
+    # Keep anything that arrived while the update was running
+    entry["PendingComments"] = entry.get("PendingComments", [])[len(pending):]
+    if not entry["PendingComments"]:
+        del entry["PendingComments"]
+    return updated
+
+def comment_index_path(video_id, cleaned_comments):
+    # Keyed by the processed comments rather than the chunks, so an index
+    # extended by refresh_comments is found again for the same comments
+    return index_path("comments", video_id, embedding_model.model_name, f"chunk_size={COMMENT_CHUNK_SIZE}", cleaned_comments)
+
+async def ensure_vectorstore(video_id, cleaned_comments):
+    """Build the comment vectorstore once per video; concurrent callers share the build."""
+    if "Vectorstore" in cache.get(video_id, {}):
+        print(f"Using cached vectorstore for video ID: {video_id}")
+        return cache[video_id]["Vectorstore"]
+
+    async def _build():
+        chunked_docs = chunk_comments(cleaned_comments, COMMENT_CHUNK_SIZE)
+        path = comment_index_path(video_id, cleaned_comments)
+        # Reuse an index saved by any worker before paying for re-embedding
+        vectorstore = await asyncio.to_thread(load_vectorstore, path, embedding_model)
+        if vectorstore is not None:
+            print(f"Loaded saved vectorstore for video ID: {video_id}")
+        else:
+            print(f"Creating and caching vectorstore for video ID: {video_id}")
+            vectorstore = await FAISS.afrom_documents(chunked_docs, embedding_model)
+            await asyncio.to_thread(save_vectorstore, vectorstore, path)
+        cache.setdefault(video_id, {})["Vectorstore"] = vectorstore
+        return vectorstore
+
+    return await single_flight(f"comment_vectorstore:{video_id}", _build)
+
 async def answer_question(video_id, question):
+    await cache.prefetch(video_id)
     # Ensure we have summary (will create if not cached)
     if video_id not in cache or "Summary" not in cache[video_id]:
         summary = await summarize_comments(video_id)
@@ -309,15 +578,7 @@ async def answer_question(video_id, question):
     if not cleaned_comments:
         return {"error": "No valid comments found after cleaning."}
     
-    # Check if vectorstore is already cached
-    if "Vectorstore" not in cache[video_id]:
-        print(f"Creating and caching vectorstore for video ID: {video_id}")
-        chunked_docs = chunk_comments(cleaned_comments)
-        vectorstore = FAISS.from_documents(chunked_docs, embedding_model)
-        cache[video_id]["Vectorstore"] = vectorstore
-    else:
-        print(f"Using cached vectorstore for video ID: {video_id}")
-        vectorstore = cache[video_id]["Vectorstore"]
+    vectorstore = await ensure_vectorstore(video_id, cleaned_comments)
     
     # Create QA chain
     qa_prompt = get_qa_prompt(summary)
@@ -330,7 +591,7 @@ async def answer_question(video_id, question):
         chain_type_kwargs={"prompt": qa_prompt},
     )
 
-    answer = qa_chain(question)
+    answer = await run_chain(qa_chain, {"query": question})
     return answer['result']
 
 # Optional: Function to clear cache for a specific video or all videos
@@ -338,24 +599,34 @@ def clear_cache(video_id=None):
     """Clear cache for a specific video or all videos."""
     global cache
     if video_id:
-        if video_id in cache:
-            del cache[video_id]
+        # Also drops copies held only in the shared cache
+        if cache.discard(video_id):
             print(f"Cache cleared for video ID: {video_id}")
+        remove_vectorstores("comments", video_id)
     else:
         cache.clear()
+        remove_vectorstores("comments")
         print("All cache cleared")
 
 # Optional: Function to get cache statistics
 def get_cache_stats():
     """Get statistics about what's cached."""
     stats = {}
-    for video_id, data in cache.items():
+    for video_id, data in cache.peek_items():
         stats[video_id] = {
+            "size_bytes": data.size,
+            "artifact_bytes": data.artifact_sizes(),
             "has_comments": "Comments" in data,
             "has_processed_comments": "ProcessedComments" in data,
             "has_summary": "Summary" in data,
             "has_vectorstore": "Vectorstore" in data,
             "comment_count": len(data.get("Comments", [])),
-            "processed_comment_count": len(data.get("ProcessedComments", []))
+            "processed_comment_count": len(data.get("ProcessedComments", [])),
+            "pending_summary_comment_count": len(data.get("PendingComments", [])),
+            "summary_input": data.get("SummaryInput")
         }
-    return stats
\ No newline at end of file
+    return stats
+
+def get_cache_metrics():
+    """Get size, eviction and expiry metrics for the comment cache."""
+    return cache.metrics()
@@ -0,0 +1,156 @@
+import os
+import string
+import zlib
+import numpy as np
+import dotenv
+dotenv.load_dotenv()
+
+# MinHash/LSH settings: 16 bands x 4 rows catch pairs above ~0.5 Jaccard as
+# candidates, which are then confirmed against NEAR_DUP_THRESHOLD
+NEAR_DUP_THRESHOLD = float(os.getenv('NEAR_DUP_THRESHOLD', 0.8))
+NEAR_DUP_SHINGLE_SIZE = 3
+# Upper bound on candidates verified per comment, so hot buckets stay cheap
+NEAR_DUP_MAX_CANDIDATES = 32
+NEAR_DUP_BANDS = 16
+NEAR_DUP_ROWS = 4
+_NUM_PERM = NEAR_DUP_BANDS * NEAR_DUP_ROWS
+_PRIME = np.uint64((1 << 61) - 1)
+_rng = np.random.default_rng(1337)
+_PERM_A = _rng.integers(1, (1 << 31) - 1, size=_NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.integers(0, (1 << 31) - 1, size=_NUM_PERM, dtype=np.uint64)
+_PUNCTUATION = str.maketrans("", "", string.punctuation)
+_stats = {"runs": 0, "input_comments": 0, "output_comments": 0,
+          "estimated_input_tokens": 0, "estimated_output_tokens": 0}
+
+def normalize_text(text):
+    """Lowercase, drop ASCII punctuation and collapse whitespace (emoji are kept)."""
+    return " ".join(text.lower().translate(_PUNCTUATION).split())
+
+def shingles(text):
+    """Word bigrams for sentences, character trigrams for very short comments."""
+    words = text.split()
+    if len(words) >= 3:
+        return {f"{a} {b}" for a, b in zip(words, words[1:])}
+    if len(text) <= NEAR_DUP_SHINGLE_SIZE:
+        return {text}
+    return {text[i:i + NEAR_DUP_SHINGLE_SIZE] for i in range(len(text) - NEAR_DUP_SHINGLE_SIZE + 1)}
+
+def minhash_signature(text):
+    shingles_ = shingles(text)
+    hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles_), dtype=np.uint64, count=len(shingles_))
+    # (a*x + b) mod p for every permutation at once; values stay below 2**63
+    return ((np.outer(hashes, _PERM_A) + _PERM_B) % _PRIME).min(axis=0)
+
+
+class NearDuplicateIndex:
+    """Incremental near-duplicate collapsing over a stream of comments.
+
+    Each added item is either a new representative or is merged into an
+    earlier one, whose like count and duplicate count grow. Exact duplicates
+    (after normalization) are found by dict lookup; near duplicates through
+    LSH buckets on MinHash signatures, so the whole pass is roughly linear.
+    """
+
+    def __init__(self, threshold=NEAR_DUP_THRESHOLD):
+        self.threshold = threshold
+        self.groups = []
+        self._exact = {}
+        self._buckets = [{} for _ in range(NEAR_DUP_BANDS)]
+        self._signatures = []
+        self.input_count = 0
+        self.input_chars = 0
+
+    def add(self, text, payload, likes=0, published=""):
+        """Add one comment; `text` is compared, `payload` is what gets rendered."""
+        self.input_count += 1
+        self.input_chars += len(payload)
+        normalized = normalize_text(text)
+        group_id = self._exact.get(normalized)
+        signature = None
+        if group_id is None and normalized:
+            signature = minhash_signature(normalized)
+            group_id = self._find_similar(signature)
+        if group_id is not None:
+            group = self.groups[group_id]
+            group["likes"] += likes
+            group["duplicates"] += 1
+            group["absorbed_chars"] += len(payload)
+            group["published"] = max(group["published"], published)
+            return group_id
+
+        group_id = len(self.groups)
+        self.groups.append({"payload": payload, "likes": likes, "duplicates": 0, "published": published,
+                            "absorbed_chars": 0})
+        self._exact[normalized] = group_id
+        self._signatures.append(signature)
+        if signature is not None:
+            for band, key in enumerate(self._band_keys(signature)):
+                self._buckets[band].setdefault(key, []).append(group_id)
+        return group_id
+
+    def _band_keys(self, signature):
+        return [signature[i * NEAR_DUP_ROWS:(i + 1) * NEAR_DUP_ROWS].tobytes() for i in range(NEAR_DUP_BANDS)]
+
+    def _find_similar(self, signature):
+        checked = set()
+        for band, key in enumerate(self._band_keys(signature)):
+            for candidate in self._buckets[band].get(key, ()):
+                if candidate in checked:
+                    continue
+                checked.add(candidate)
+                if len(checked) > NEAR_DUP_MAX_CANDIDATES:
+                    return None
+                if np.mean(self._signatures[candidate] == signature) >= self.threshold:
+                    return candidate
+        return None
+
+    def render(self, start=0):
+        """Representatives in first-seen order, from group `start` on.
+
+        A representative is annotated with what it absorbed only when the
+        dropped duplicates were longer than the annotation, so collapsing
+        never makes the output longer than the input.
+        """
+        rendered = []
+        for group in self.groups[start:]:
+            suffix = f" [+{group['duplicates']} similar, {group['likes']} likes]" if group["duplicates"] else ""
+            if suffix and len(suffix) <= group["absorbed_chars"]:
+                rendered.append(group["payload"] + suffix)
+            else:
+                rendered.append(group["payload"])
+        return rendered
+
+    @property
+    def nbytes(self):
+        # Signatures dominate; payloads are counted once, bucket lists roughly
+        return sum(len(group["payload"]) + 200 for group in self.groups) + \
+               len(self.groups) * (_NUM_PERM * 8 + NEAR_DUP_BANDS * 8)
+
+    def stats(self, rendered=None):
+        rendered = self.render() if rendered is None else rendered
+        output_chars = sum(len(item) for item in rendered)
+        return {
+            "input_comments": self.input_count,
+            "output_comments": len(rendered),
+            "collapsed_comments": self.input_count - len(rendered),
+            # ~4 characters per token for English text
+            "estimated_input_tokens": self.input_chars // 4,
+            "estimated_output_tokens": output_chars // 4,
+        }
+
+
+def record_reduction(stats):
+    """Fold one collapsing pass into the process-wide reduction counters."""
+    _stats["runs"] += 1
+    for key in ("input_comments", "output_comments", "estimated_input_tokens", "estimated_output_tokens"):
+        _stats[key] += stats[key]
+
+def get_comment_dedup_stats():
+    """Get how many comments and estimated prompt tokens near-duplicate collapsing removed."""
+    stats = dict(_stats)
+    stats["threshold"] = NEAR_DUP_THRESHOLD
+    stats["token_reduction_ratio"] = (
+        round(1 - stats["estimated_output_tokens"] / stats["estimated_input_tokens"], 4)
+        if stats["estimated_input_tokens"] else 0.0
+    )
+    return stats
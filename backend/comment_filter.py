@@ -0,0 +1,78 @@
+import re
+
+LINK_RE = re.compile(r'https?://\S+|www\.\S+')
+TIMESTAMP_RE = re.compile(r'\d{1,2}(:\d{2}){1,3}')
+CHAR_TIMESTAMP_RE = re.compile(r'^\s*\d{1,2}(:\d{2}){1,3}[\s\u200B]*[-:|]*[\s\u200B]+[a-zA-Z]{2,}.*$', re.MULTILINE)
+CODE_KEYWORD_RE = re.compile(r'\b(def|class|return|import|lambda|function|const|var|=>|try|except|elif)\b')
+CODE_STRUCTURE_RE = re.compile(r'(==|===|{|}|\[|\]|::|->|=)')
+INDENTED_LINE_RE = re.compile(r'^\s{4,}', re.MULTILINE)
+CODE_STRUCTURE_CHARS = frozenset('={}[]:-')
+
+def _count(pattern, text, limit):
+    """Count non-overlapping matches, stopping once `limit` is reached."""
+    count = 0
+    for _ in pattern.finditer(text):
+        count += 1
+        if count >= limit:
+            break
+    return count
+
+def remove_links(comment):
+    # Both link forms need one of these substrings, so most comments skip the regex
+    if 'http' not in comment and 'www.' not in comment:
+        return comment.strip()
+    return LINK_RE.sub('', comment).strip()
+
+def has_multiple_timestamps(comment):
+    if ':' not in comment:
+        return False
+    return _count(TIMESTAMP_RE, comment, 4) > 3
+
+def has_char_timestamps(comment):
+    if ':' not in comment:
+        return False
+    return _count(CHAR_TIMESTAMP_RE, comment, 4) > 3
+
+def is_code_heavy(comment):
+    comment = comment.strip()
+    num_lines = comment.count('\n') + 1
+    structures = 0 if CODE_STRUCTURE_CHARS.isdisjoint(comment) else _count(CODE_STRUCTURE_RE, comment, 3)
+    indented = _count(INDENTED_LINE_RE, comment, 2)
+
+    score = 0
+    if structures >= 3:
+        score += 2
+    if indented >= 2:
+        score += 2
+    if num_lines >= 3:
+        score += 1
+    # Keywords can add at most 3 more points; skip the scan when the outcome is already known
+    if score >= 5:
+        return True
+    if score + 3 < 5:
+        return False
+    keywords = _count(CODE_KEYWORD_RE, comment, 2)
+    if keywords >= 2:
+        score += 2
+    if keywords > 0 and structures > 0:
+        score += 1
+    return score >= 5
+
+def clean_and_filter_comment(comment):
+    comment = remove_links(comment)
+    if not comment:
+        return None
+    if is_code_heavy(comment):
+        return None
+    if has_multiple_timestamps(comment) and not has_char_timestamps(comment):
+        return None
+    return comment
+
+def filter_comments(comments, keep_dropped=False):
+    """Clean a batch of comments, dropping links-only, code-heavy and timestamp-list comments.
+
+    With keep_dropped, dropped comments come back as None so the result lines
+    up with the input.
+    """
+    cleaned = map(clean_and_filter_comment, comments)
+    return list(cleaned) if keep_dropped else [comment for comment in cleaned if comment]
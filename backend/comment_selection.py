@@ -0,0 +1,75 @@
+import heapq
+import math
+import os
+import re
+import dotenv
+dotenv.load_dotenv()
+
+# Prompt budget for the comment summary; anything beyond it is left out
+COMMENT_SUMMARY_TOKEN_BUDGET = int(os.getenv('COMMENT_SUMMARY_TOKEN_BUDGET', 12000))
+COMMENT_LIKES_WEIGHT = 0.7
+COMMENT_RECENCY_WEIGHT = 0.3
+_WORD_RE = re.compile(r"\w{4,}")
+
+def estimate_tokens(text):
+    # ~4 characters per token for English text, plus the separator
+    return len(text) // 4 + 1
+
+def _score(likes, recency, max_likes):
+    likes_score = math.log1p(likes) / math.log1p(max_likes) if max_likes else 0.0
+    return COMMENT_LIKES_WEIGHT * likes_score + COMMENT_RECENCY_WEIGHT * recency
+
+def _novelty(words, covered):
+    if not words:
+        return 1.0
+    return len(words - covered) / len(words)
+
+def select_comments(items, token_budget=COMMENT_SUMMARY_TOKEN_BUDGET):
+    """Pick comments for the summary prompt within a token budget.
+
+    `items` are dicts with "text", "likes" and "published" (ISO date). Each
+    comment scores by likes (log-scaled) and recency, discounted by how many
+    of its words earlier picks already cover, so the prompt favours popular,
+    recent and topically varied comments. Greedy with lazy re-scoring, so the
+    cost is O(n log n) whatever the budget.
+    """
+    if not items:
+        return [], {"comments_available": 0, "comments_included": 0,
+                    "tokens_available": 0, "tokens_included": 0, "token_budget": token_budget}
+
+    max_likes = max(item["likes"] for item in items)
+    by_date = sorted(range(len(items)), key=lambda i: items[i]["published"] or "")
+    recency = [0.0] * len(items)
+    for rank, i in enumerate(by_date):
+        recency[i] = rank / (len(items) - 1) if len(items) > 1 else 1.0
+
+    tokens = [estimate_tokens(item["text"]) for item in items]
+    words = [set(_WORD_RE.findall(item["text"].lower())) for item in items]
+    base = [_score(item["likes"], recency[i], max_likes) for i, item in enumerate(items)]
+
+    heap = [(-base[i], i) for i in range(len(items))]
+    heapq.heapify(heap)
+    covered = set()
+    selected = []
+    remaining = token_budget
+    while heap and remaining > 0:
+        _, i = heapq.heappop(heap)
+        if tokens[i] > remaining:
+            continue
+        score = base[i] * (0.5 + 0.5 * _novelty(words[i], covered))
+        # Scores only drop as coverage grows; re-queue if another item may now beat this one
+        if heap and score < -heap[0][0]:
+            heapq.heappush(heap, (-score, i))
+            continue
+        selected.append(i)
+        covered |= words[i]
+        remaining -= tokens[i]
+
+    stats = {
+        "comments_available": len(items),
+        "comments_included": len(selected),
+        "tokens_available": sum(tokens),
+        "tokens_included": token_budget - remaining,
+        "token_budget": token_budget,
+    }
+    return [items[i]["text"] for i in selected], stats
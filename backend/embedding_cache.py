@@ -0,0 +1,117 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import numpy as np
+from langchain.embeddings.base import Embeddings
+import dotenv
+dotenv.load_dotenv()
+
+# Persistent vectors keyed by hash(model, kind, text), stored as float32 blobs
+EMBEDDING_CACHE_PATH = os.getenv('EMBEDDING_CACHE_PATH', os.path.join('cache', 'embeddings.sqlite3'))
+_LOOKUP_BATCH = 500
+
+class EmbeddingStore:
+    """SQLite store of float32 vectors shared by all workers on the host."""
+
+    def __init__(self, path=EMBEDDING_CACHE_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=5, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+        self._conn.commit()
+
+    def get_many(self, keys):
+        found = {}
+        try:
+            with self._lock:
+                for i in range(0, len(keys), _LOOKUP_BATCH):
+                    batch = keys[i:i + _LOOKUP_BATCH]
+                    placeholders = ",".join("?" * len(batch))
+                    rows = self._conn.execute(
+                        f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch
+                    ).fetchall()
+                    for key, blob in rows:
+                        found[key] = np.frombuffer(blob, dtype=np.float32)
+        except sqlite3.Error as e:
+            print(f"Embedding cache read failed: {e}")
+        return found
+
+    def put_many(self, items):
+        try:
+            with self._lock:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                    [(key, np.asarray(vector, dtype=np.float32).tobytes()) for key, vector in items]
+                )
+                self._conn.commit()
+        except sqlite3.Error as e:
+            print(f"Embedding cache write failed: {e}")
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+
+_store = None
+_stats = {"lookups": 0, "hits": 0, "misses": 0, "provider_calls": 0, "calls_saved": 0}
+
+def get_embedding_store():
+    global _store
+    if _store is None:
+        _store = EmbeddingStore()
+    return _store
+
+def embedding_key(model_name, kind, text):
+    return hashlib.sha256(f"{model_name}\x1f{kind}\x1f{text}".encode("utf-8")).hexdigest()
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that only sends cache misses to the underlying provider."""
+
+    def __init__(self, underlying, model_name):
+        self.underlying = underlying
+        self.model_name = model_name
+
+    def _embed(self, texts, kind, embed_fn):
+        store = get_embedding_store()
+        keys = [embedding_key(self.model_name, kind, text) for text in texts]
+        cached = store.get_many(list(dict.fromkeys(keys)))
+        _stats["lookups"] += len(texts)
+
+        # Identical texts in one call are embedded once
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in cached and key not in missing:
+                missing[key] = text
+        _stats["hits"] += sum(1 for key in keys if key in cached)
+        _stats["misses"] += len(missing)
+
+        if missing:
+            vectors = embed_fn(list(missing.values()))
+            _stats["provider_calls"] += 1
+            new_items = list(zip(missing.keys(), vectors))
+            store.put_many(new_items)
+            for key, vector in new_items:
+                cached[key] = np.asarray(vector, dtype=np.float32)
+        else:
+            _stats["calls_saved"] += 1
+        return [cached[key].tolist() for key in keys]
+
+    def embed_documents(self, texts):
+        return self._embed(list(texts), "document", self.underlying.embed_documents)
+
+    def embed_query(self, text):
+        return self._embed([text], "query", lambda texts: [self.underlying.embed_query(texts[0])])[0]
+
+
+def get_embedding_cache_stats():
+    """Get hit ratio and provider calls saved by the embedding cache."""
+    stats = dict(_stats)
+    stats["hit_ratio"] = round(stats["hits"] / stats["lookups"], 4) if stats["lookups"] else 0.0
+    stats["texts_saved"] = stats["hits"]
+    return stats
@@ -0,0 +1,120 @@
+import hashlib
+import os
+import random
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from langchain.embeddings.base import Embeddings
+from embedding_cache import CachedEmbeddings
+import dotenv
+dotenv.load_dotenv()
+
+# "google" (GoogleGenerativeAIEmbeddings) or "local" (offline hashing vectorizer)
+EMBEDDING_PROVIDER = os.getenv('EMBEDDING_PROVIDER', 'google').lower()
+EMBEDDING_BATCH_SIZE = int(os.getenv('EMBEDDING_BATCH_SIZE', 64))
+EMBEDDING_CONCURRENCY = int(os.getenv('EMBEDDING_CONCURRENCY', 4))
+EMBEDDING_MAX_RETRIES = int(os.getenv('EMBEDDING_MAX_RETRIES', 4))
+EMBEDDING_BACKOFF_SECONDS = float(os.getenv('EMBEDDING_BACKOFF_SECONDS', 1.0))
+EMBEDDING_HASH_DIM = int(os.getenv('EMBEDDING_HASH_DIM', 512))
+
+_executor = ThreadPoolExecutor(max_workers=EMBEDDING_CONCURRENCY, thread_name_prefix="embed")
+_stats = {"batches": 0, "texts": 0, "retries": 0, "failures": 0}
+_TOKEN_RE = re.compile(r"\w+")
+_RATE_LIMIT_MARKERS = ("429", "rate limit", "resource exhausted", "resourceexhausted", "quota", "503", "unavailable")
+
+
+class HashingEmbeddings(Embeddings):
+    """Offline CPU embedder: signed feature hashing of unigrams and bigrams with
+    sublinear term frequency, L2-normalized. No network, deterministic."""
+
+    def __init__(self, dim=EMBEDDING_HASH_DIM):
+        self.dim = dim
+        self.model_name = f"local-hashing-{dim}"
+
+    def _vector(self, text):
+        tokens = _TOKEN_RE.findall(text.lower())
+        features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+        counts = {}
+        for feature in features:
+            digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+            value = int.from_bytes(digest, "little")
+            bucket = value % self.dim
+            sign = 1.0 if (value >> 63) & 1 else -1.0
+            counts[bucket] = counts.get(bucket, 0.0) + sign
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for bucket, count in counts.items():
+            vector[bucket] = np.sign(count) * (1.0 + np.log(abs(count))) if count else 0.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts):
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text):
+        return self._vector(text)
+
+
+def _is_rate_limited(error):
+    message = f"{type(error).__name__} {error}".lower()
+    return any(marker in message for marker in _RATE_LIMIT_MARKERS)
+
+
+class BatchedEmbeddings(Embeddings):
+    """Splits embedding work into fixed-size batches, dispatches them concurrently
+    and retries rate-limited batches with exponential backoff and jitter."""
+
+    def __init__(self, provider, batch_size=EMBEDDING_BATCH_SIZE):
+        self.provider = provider
+        self.batch_size = batch_size
+
+    def _with_retry(self, fn, arg):
+        for attempt in range(EMBEDDING_MAX_RETRIES + 1):
+            try:
+                return fn(arg)
+            except Exception as e:
+                if attempt == EMBEDDING_MAX_RETRIES or not _is_rate_limited(e):
+                    _stats["failures"] += 1
+                    raise
+                _stats["retries"] += 1
+                delay = EMBEDDING_BACKOFF_SECONDS * (2 ** attempt) * (1 + random.random())
+                print(f"Embedding request rate limited, retrying in {delay:.1f}s: {e}")
+                time.sleep(delay)
+
+    def _embed_batch(self, batch):
+        vectors = self._with_retry(self.provider.embed_documents, batch)
+        _stats["batches"] += 1
+        _stats["texts"] += len(batch)
+        return vectors
+
+    def embed_documents(self, texts):
+        texts = list(texts)
+        batches = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+        if len(batches) <= 1:
+            return self._embed_batch(batches[0]) if batches else []
+        # Batches keep their order; at most EMBEDDING_CONCURRENCY run at once
+        results = _executor.map(self._embed_batch, batches)
+        return [vector for vectors in results for vector in vectors]
+
+    def embed_query(self, text):
+        return self._with_retry(self.provider.embed_query, text)
+
+
+def build_embeddings(model_name, google_api_key=None):
+    """Embedding stack used by the QA modules: content-addressed cache in front of
+    batched, retrying dispatch to the configured provider."""
+    if EMBEDDING_PROVIDER == "local":
+        provider = HashingEmbeddings()
+        model_name = provider.model_name
+    else:
+        from langchain_google_genai import GoogleGenerativeAIEmbeddings
+        provider = GoogleGenerativeAIEmbeddings(model=model_name, google_api_key=google_api_key)
+    return CachedEmbeddings(BatchedEmbeddings(provider), model_name=model_name)
+
+def get_embedding_service_stats():
+    """Get batch, retry and failure counters for embedding dispatch."""
+    stats = dict(_stats)
+    stats["provider"] = EMBEDDING_PROVIDER
+    stats["batch_size"] = EMBEDDING_BATCH_SIZE
+    stats["concurrency"] = EMBEDDING_CONCURRENCY
+    return stats
@@ -0,0 +1,36 @@
+import asyncio
+import os
+import dotenv
+dotenv.load_dotenv()
+
+# Global cap on concurrent LLM calls across summaries and QA
+LLM_MAX_CONCURRENCY = int(os.getenv('LLM_MAX_CONCURRENCY', 4))
+
+_llm_semaphore = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+_stats = {"active": 0, "waiting": 0, "completed": 0, "failed": 0}
+
+async def run_chain(chain, inputs):
+    """Run a langchain chain with its native async API under the global LLM limit.
+
+    ainvoke keeps the event loop free while Gemini responds, so other requests
+    are not stalled behind a long summary.
+    """
+    _stats["waiting"] += 1
+    async with _llm_semaphore:
+        _stats["waiting"] -= 1
+        _stats["active"] += 1
+        try:
+            result = await chain.ainvoke(inputs)
+            _stats["completed"] += 1
+            return result
+        except Exception:
+            _stats["failed"] += 1
+            raise
+        finally:
+            _stats["active"] -= 1
+
+def get_llm_stats():
+    """Get counters for in-flight and completed LLM calls."""
+    stats = dict(_stats)
+    stats["max_concurrency"] = LLM_MAX_CONCURRENCY
+    return stats
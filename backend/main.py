@@ -4,10 +4,28 @@ from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import List
-from youtube_search import search_youtube, get_sentiments, search_video
-from comment_QA import extract_comments, summarize_comments, answer_question, get_cache_stats
-from video_QA import get_transcript, summarize_video, answer_video_question, get_transcript_preview, get_video_cache_stats
-app = FastAPI()
+from contextlib import asynccontextmanager
+from http_client import init_session, close_session
+from channel_store import get_channel_cache_stats
+from singleflight import get_single_flight_stats
+from llm_runtime import get_llm_stats
+from transcript_jobs import get_transcript_job_stats
+from embedding_cache import get_embedding_cache_stats
+from embedding_service import get_embedding_service_stats
+from comment_dedup import get_comment_dedup_stats
+from caption_tracks import get_caption_track_stats
+from youtube_search import search_youtube, get_sentiments, search_video, get_search_cache_stats
+from comment_QA import extract_comments, refresh_comments, summarize_comments, answer_question, get_cache_stats, get_cache_metrics
+from video_QA import load_transcript, get_transcript_window, search_transcript, search_cached_transcripts, summarize_video, answer_video_question, get_transcript_preview, get_video_cache_stats, get_video_cache_metrics
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One pooled HTTP session shared by every upstream call for the app's lifetime
+    await init_session()
+    yield
+    await close_session()
+
+app = FastAPI(lifespan=lifespan)
 
 origins = [
     "http://localhost:3000",
@@ -36,19 +54,37 @@ async def search(
     Search YouTube for videos matching the query with pagination.
     """
     try:
-        results_df, next_page_token = await search_youtube(query, max_results=max_results, page_token=page_token)
+        videos, next_page_token = await search_youtube(query, max_results=max_results, page_token=page_token)
         
-        if results_df.empty:
+        if not videos:
             return {"results": {"videos": [], "nextPageToken": None}}
 
         results = {
-            "videos": results_df.to_dict(orient="records"),
+            "videos": videos,
             "nextPageToken": next_page_token
         } 
         return {"results": results}
     except Exception as e:
         return {"error": str(e)}
 
+# Registered before /video/{video_id}, which would otherwise match "search"
+@app.get(
+    "/video/search",
+    summary="Search Cached Transcripts",
+    description="Finds terms or quoted phrases across all cached transcripts using a local inverted index. Returns timestamps in milliseconds.",
+    tags=["Video"]
+)
+async def search_all_transcripts(
+    q: str = Query(..., min_length=1, description='Terms and/or "quoted phrases" to find'),
+    limit: int = Query(20, ge=1, le=200, description="Maximum hits per video"),
+    require_all: bool = Query(False, description="Only return segments matching every term/phrase")
+):
+    """Search every cached transcript for terms or phrases."""
+    try:
+        return {"results": search_cached_transcripts(q, limit, require_all)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error searching transcripts: {str(e)}")
+
 @app.get('/video/{video_id}',
     summary="Get YouTube Video Details",
     description="Fetches details of a YouTube video by its ID, including title, description, thumbnail URL, and channel information.",
@@ -60,10 +96,10 @@ async def get_video_details(video_id: str):
     """
     try:
         video_details = await search_video(video_id)
-        if video_details.empty:
+        if not video_details:
             print(f"No video found or an issue occurred for video ID: {video_id}")
             return {"results": {}}
-        return {"results": video_details.to_dict(orient="records")[0]}
+        return {"results": video_details}
     except Exception as e:
         return {"error": str(e)}
 
@@ -83,6 +119,19 @@ async def get_comments(video_id: str):
     except Exception as e:
         return {"error": str(e)}
 
+@app.get(
+    "/comments/refresh/{video_id}",
+    summary="Refresh YouTube Comments",
+    description="Fetches only comments newer than the cached ones and updates the cached comments, vectorstore and summary incrementally.",
+    tags=["Comments"]
+)
+async def refresh_video_comments(video_id: str):
+    try:
+        result = await refresh_comments(video_id)
+        return {"results": result}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error refreshing comments: {str(e)}")
+
 class CommentsInput(BaseModel):
     comments: List[str]
 
@@ -161,10 +210,10 @@ async def comment_qa(
     description="Fetches the transcript of a YouTube video with timestamps.",
     tags=["Video"]
 )   
-def get_video_transcript(video_id: str):
+async def get_video_transcript(video_id: str):
     """Get the full transcript of a YouTube video."""
     try:
-        transcript = get_transcript(video_id)
+        transcript = await load_transcript(video_id)
         if not transcript:
             print(f"No transcript found or an issue occurred for video ID: {video_id}")
             return {"results": ''}
@@ -176,6 +225,55 @@ def get_video_transcript(video_id: str):
     except Exception as e:
         return {"error": str(e)}
 
+@app.get(
+    "/video/transcript/{video_id}/segment",
+    summary="Get Transcript Segment",
+    description="Returns the transcript segments overlapping a time window, found by binary search over the cached transcript.",
+    tags=["Video"]
+)
+async def get_video_transcript_segment(
+    video_id: str,
+    start: float = Query(None, ge=0, description="Window start in seconds"),
+    end: float = Query(None, ge=0, description="Window end in seconds")
+):
+    """Get the part of a YouTube video transcript between two times."""
+    if start is not None and end is not None and end < start:
+        raise HTTPException(status_code=400, detail="end must not be before start")
+    try:
+        segment = await get_transcript_window(video_id, start, end)
+        if "error" in segment:
+            return JSONResponse(
+                status_code=404,
+                content={"message": segment["error"], "results": None}
+            )
+        return {"video_id": video_id, "results": segment}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error getting transcript segment: {str(e)}")
+
+@app.get(
+    "/video/search/{video_id}",
+    summary="Search Video Transcript",
+    description="Finds where a video mentions terms or quoted phrases using a local inverted index, without LLM calls. Returns timestamps in milliseconds.",
+    tags=["Video"]
+)
+async def search_video_transcript(
+    video_id: str,
+    q: str = Query(..., min_length=1, description='Terms and/or "quoted phrases" to find'),
+    limit: int = Query(20, ge=1, le=200, description="Maximum number of hits"),
+    require_all: bool = Query(False, description="Only return segments matching every term/phrase")
+):
+    """Search one YouTube video transcript for terms or phrases."""
+    try:
+        found = await search_transcript(video_id, q, limit, require_all)
+        if "error" in found:
+            return JSONResponse(
+                status_code=404,
+                content={"message": found["error"], "results": None}
+            )
+        return {"video_id": video_id, "results": found}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error searching transcript: {str(e)}")
+
 @app.get(
     "/video/summarize/{video_id}",
     summary="Summarize Video Content",
@@ -244,7 +342,18 @@ async def cache_preview(video_id: str):
             "video_id": video_id,
             "transcript_preview": transcript_preview,
             "comment_cache_info": comment_stats,
-            "video_cache_info": video_stats
+            "video_cache_info": video_stats,
+            "comment_cache_metrics": get_cache_metrics(),
+            "video_cache_metrics": get_video_cache_metrics(),
+            "search_cache_info": get_search_cache_stats(),
+            "channel_cache_info": get_channel_cache_stats(),
+            "single_flight_info": get_single_flight_stats(),
+            "llm_info": get_llm_stats(),
+            "transcript_job_info": get_transcript_job_stats(),
+            "embedding_cache_info": get_embedding_cache_stats(),
+            "embedding_service_info": get_embedding_service_stats(),
+            "comment_dedup_info": get_comment_dedup_stats(),
+            "caption_track_info": get_caption_track_stats()
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting cache preview: {str(e)}")
@@ -0,0 +1,85 @@
+from dataclasses import dataclass
+from datetime import datetime
+import isodate
+
+@dataclass(slots=True)
+class VideoRecord:
+    """One row of /search or /video/{id} output, built directly from API items."""
+    title: str
+    channel: str
+    subscribers: int
+    views: int
+    likes: int
+    likes_pct: float | None
+    duration: str
+    upload_date: datetime | None
+    comments: int
+    video_link: str
+    thumbnail: str
+    channel_thumbnail: str
+    description: str
+
+    def to_dict(self):
+        # Same keys and column order the frontend already consumes
+        return {
+            "Title": f'<a href="{self.video_link}" target="_blank">{self.title}</a>',
+            "Channel": self.channel,
+            "Subscribers": self.subscribers,
+            "Views": self.views,
+            "Likes": self.likes,
+            "Likes(%)": self.likes_pct,
+            "Duration": self.duration,
+            "Upload_date": self.upload_date,
+            "Comments": self.comments,
+            "Video_link": self.video_link,
+            "Thumbnail": self.thumbnail,
+            "Channel_Thumbnail": self.channel_thumbnail,
+            "Description": self.description,
+        }
+
+def format_duration(duration_str):
+    total_seconds = int(isodate.parse_duration(duration_str).total_seconds())
+    hours = total_seconds // 3600
+    minutes = (total_seconds % 3600) // 60
+    seconds = total_seconds % 60
+    return f"{hours:02}:{minutes:02}:{seconds:02}"
+
+def parse_upload_date(published_at):
+    """Keep only the date part of an RFC 3339 timestamp, as a midnight datetime."""
+    try:
+        return datetime.strptime(published_at.split('T')[0], "%Y-%m-%d")
+    except (AttributeError, ValueError):
+        return None
+
+def best_thumbnail_url(thumbnails):
+    return thumbnails.get("high", {}).get("url") or \
+           thumbnails.get("medium", {}).get("url") or \
+           thumbnails.get("default", {}).get("url") or ""
+
+def build_video_record(video, channel=None):
+    """Normalize a videos.list item and its channels.list item into a VideoRecord."""
+    channel = channel or {}
+    video_id = video["id"]
+    snippet = video["snippet"]
+    statistics = video.get("statistics", {})
+    content_details = video.get("contentDetails", {})
+    channel_statistics = channel.get("statistics", {})
+    channel_snippet = channel.get("snippet", {})
+
+    views = int(statistics.get("viewCount", 0))
+    likes = int(statistics.get("likeCount", 0))
+    return VideoRecord(
+        title=snippet["title"],
+        channel=snippet["channelTitle"],
+        subscribers=int(channel_statistics.get("subscriberCount", 0)),
+        views=views,
+        likes=likes,
+        likes_pct=likes / views * 100 if views else None,
+        duration=format_duration(content_details.get('duration', 'PT0S')),
+        upload_date=parse_upload_date(snippet.get("publishedAt")),
+        comments=int(statistics.get("commentCount", 0)),
+        video_link=f"https://www.youtube.com/watch?v={video_id}",
+        thumbnail=snippet.get("thumbnails", {}).get("high", {}).get("url", ""),
+        channel_thumbnail=best_thumbnail_url(channel_snippet.get("thumbnails", {})),
+        description=snippet.get("description", "No description available."),
+    )
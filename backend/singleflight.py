@@ -0,0 +1,33 @@
+import asyncio
+
+# Logical request key -> in-flight task shared by every concurrent caller
+_inflight = {}
+_stats = {"calls": 0, "executed": 0, "coalesced": 0}
+
+async def single_flight(key, coro_factory):
+    """Run coro_factory() once per key at a time; concurrent callers await the same result.
+
+    The shared task is shielded so a cancelled caller does not cancel it for the others.
+    """
+    _stats["calls"] += 1
+    task = _inflight.get(key)
+    if task is not None:
+        _stats["coalesced"] += 1
+        return await asyncio.shield(task)
+
+    _stats["executed"] += 1
+    task = asyncio.ensure_future(coro_factory())
+    _inflight[key] = task
+
+    def _forget(done_task):
+        if _inflight.get(key) is done_task:
+            del _inflight[key]
+
+    task.add_done_callback(_forget)
+    return await asyncio.shield(task)
+
+def get_single_flight_stats():
+    """Get counters for executed and coalesced upstream calls."""
+    stats = dict(_stats)
+    stats["in_flight"] = len(_inflight)
+    return stats
@@ -0,0 +1,15 @@
+import os
+import sys
+import tempfile
+
+# Offline settings: dummy API keys, local embedder, no shared cache, scratch cache dirs
+_scratch = tempfile.mkdtemp(prefix="yt-analyzer-tests-")
+os.environ.setdefault("GOOGLE_API_KEY", "test-key")
+os.environ.setdefault("API_KEY_VIDEO", "test-key")
+os.environ.setdefault("API_KEY_COMMENTS", "test-key")
+os.environ["EMBEDDING_PROVIDER"] = "local"
+os.environ["ARTIFACT_CACHE_BACKEND"] = "none"
+os.environ["EMBEDDING_CACHE_PATH"] = os.path.join(_scratch, "embeddings.sqlite3")
+os.environ["VECTOR_INDEX_DIR"] = os.path.join(_scratch, "faiss")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,134 @@
+import asyncio
+import socket
+import threading
+
+import cache_backends
+from artifact_cache import ArtifactCache
+from cache_backends import CacheBackend, RedisCacheBackend, SQLiteCacheBackend
+
+
+class CountingBackend(CacheBackend):
+    name = "counting"
+
+    def __init__(self):
+        self.data = {}
+        self.gets = []
+        self.threads = set()
+
+    def get(self, key):
+        self.gets.append(key)
+        self.threads.add(threading.get_ident())
+        return self.data.get(key)
+
+    def set(self, key, value, ttl=None):
+        self.data[key] = value
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+    def clear_prefix(self, prefix):
+        for key in [key for key in self.data if key.startswith(prefix)]:
+            del self.data[key]
+
+
+def make_cache(backend, **kwargs):
+    return ArtifactCache(max_bytes=10 ** 7, backend=backend, namespace="test",
+                         versions={"Summary": "1", "Comments": "1"}, **kwargs)
+
+def drain(cache):
+    """Wait for queued shared-cache writes to land."""
+    cache._l2_thread().submit(lambda: None).result()
+
+
+def test_lookups_stay_local_and_prefetch_reads_off_the_loop(tmp_path):
+    backend = SQLiteCacheBackend(str(tmp_path / "artifacts.sqlite3"))
+    writer, reader = make_cache(backend), make_cache(backend)
+    writer["vid"] = {"Summary": "shared summary"}
+    drain(writer)
+
+    assert "vid" not in reader
+
+    async def main():
+        await reader.prefetch("vid")
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(main())
+    assert reader["vid"]["Summary"] == "shared summary"
+    assert reader.l2_hits == 1
+    assert reader._l2_executor._threads and loop_thread not in {t.ident for t in reader._l2_executor._threads}
+
+
+def test_misses_are_remembered():
+    backend = CountingBackend()
+    cache = make_cache(backend, negative_ttl=60)
+
+    async def main():
+        for _ in range(5):
+            await cache.prefetch("missing")
+
+    asyncio.run(main())
+    assert len(backend.gets) == 2  # one per versioned artifact, not per lookup
+    assert threading.get_ident() not in backend.threads
+    assert cache.metrics()["l2_negative_hits"] == 8
+
+    # A local write replaces the remembered miss
+    cache["missing"] = {"Summary": "now present"}
+    drain(cache)
+    other = make_cache(backend)
+    asyncio.run(other.prefetch("missing"))
+    assert other["missing"]["Summary"] == "now present"
+
+
+def test_clear_drops_shared_copies():
+    backend = CountingBackend()
+    cache = make_cache(backend)
+    cache["a"] = {"Summary": "x"}
+    cache["b"] = {"Comments": ["y"]}
+    backend.data["other:Summary:1:a"] = "kept"
+    drain(cache)
+
+    cache.clear()
+    drain(cache)
+    asyncio.run(cache.prefetch("a"))
+    assert "a" not in cache
+    assert list(backend.data) == ["other:Summary:1:a"]
+
+
+def test_discard_removes_shared_only_copies():
+    backend = CountingBackend()
+    writer, other = make_cache(backend), make_cache(backend)
+    writer["vid"] = {"Summary": "x"}
+    drain(writer)
+
+    assert other.discard("vid") is False
+    drain(other)
+    assert backend.data == {}
+
+
+def _unused_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_unreachable_redis_opens_the_circuit(monkeypatch):
+    monkeypatch.setattr(cache_backends, "ARTIFACT_CACHE_FAILURE_THRESHOLD", 2)
+    backend = RedisCacheBackend(f"redis://127.0.0.1:{_unused_port()}/0")
+    connects = []
+    connect = backend._connect
+    monkeypatch.setattr(backend, "_connect", lambda: (connects.append(1), connect()))
+
+    for _ in range(10):
+        assert backend.get("key") is None
+    backend.set("key", "value")
+
+    assert len(connects) == 2
+    stats = backend.stats()
+    assert stats["circuit_open"] and stats["skipped"] == 9
+
+
+def test_redis_corrupt_value_is_a_miss(monkeypatch):
+    backend = RedisCacheBackend("redis://127.0.0.1:1/0")
+    monkeypatch.setattr(backend, "_command", lambda *args: b"{not json")
+    assert backend.get("key") is None
+    assert backend.errors == 1
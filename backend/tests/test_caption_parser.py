@@ -0,0 +1,116 @@
+"""Incremental caption parsers (user-023)."""
+import json
+import os
+
+import pytest
+
+from caption_parser import XMLCaptionParser, get_caption_parser, parse_caption_stream, pick_caption_track
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "captions")
+FORMATS = ("srv1", "srv2", "srv3", "json3", "vtt", "ttml")
+
+
+def load(ext):
+    with open(os.path.join(FIXTURES, f"talk.{ext}"), "rb") as f:
+        return f.read()
+
+
+def split(body, size):
+    return [body[i:i + size] for i in range(0, len(body), size)]
+
+
+@pytest.mark.parametrize("ext", FORMATS)
+def test_fixture_parses_the_same_at_any_chunk_boundary(ext):
+    body = load(ext)
+    whole = parse_caption_stream([body], ext)
+    for size in (1, 7, 1000):
+        assert parse_caption_stream(split(body, size), ext) == whole
+
+
+@pytest.mark.parametrize("ext", FORMATS)
+def test_every_format_yields_the_same_captions(ext):
+    reference = parse_caption_stream([load("srv1")], "srv1")
+    captions = parse_caption_stream([load(ext)], ext)
+    assert [c["text"] for c in captions] == [c["text"] for c in reference]
+    assert [c["start"] for c in captions] == [c["start"] for c in reference]
+    assert [c["duration"] for c in captions] == pytest.approx([c["duration"] for c in reference], abs=0.011)
+    assert reference[0] == {"start": 0.08, "duration": 3.54, "text": "so today we're going to talk about caching"}
+
+
+def test_srv2_and_srv3_split_inside_tags_and_entities():
+    srv2 = b'<?xml version="1.0" encoding="utf-8" ?><timedtext><text t="1500" d="2000">fish &amp; chips</text>' \
+           b'<text t="3500" d="1000">caf\xc3\xa9</text></timedtext>'
+    srv3 = b'<timedtext format="3"><body><p t="0" d="900"><s ac="0">hello</s><s t="300" ac="0"> there</s></p>' \
+           b'<p t="880" d="20" a="1">\n</p><p t="900" d="500"><s>caf\xc3\xa9</s></p></body></timedtext>'
+    for size in (1, 2, 3, 5):
+        assert parse_caption_stream(split(srv2, size), "srv2") == [
+            {"start": 1.5, "duration": 2.0, "text": "fish & chips"},
+            {"start": 3.5, "duration": 1.0, "text": "café"},
+        ]
+        assert parse_caption_stream(split(srv3, size), "srv3") == [
+            {"start": 0.0, "duration": 0.9, "text": "hello there"},
+            {"start": 0.9, "duration": 0.5, "text": "café"},
+        ]
+
+
+def test_json3_split_inside_events_and_multibyte_characters():
+    body = json.dumps({"wireMagic": "pb3", "events": [
+        {"tStartMs": 0, "dDurationMs": 5000, "id": 1},
+        {"tStartMs": 100, "dDurationMs": 1400, "segs": [{"utf8": "こんにちは"}, {"utf8": " [\"quoted\"] {x}"}]},
+        {"tStartMs": 1500, "aAppend": 1, "segs": [{"utf8": "\n"}]},
+        {"tStartMs": 1600, "dDurationMs": 900, "segs": [{"utf8": "bye"}]},
+    ]}, ensure_ascii=False).encode("utf-8")
+    for size in (1, 2, 4, 9):
+        assert parse_caption_stream(split(body, size), "json3") == [
+            {"start": 0.1, "duration": 1.4, "text": 'こんにちは ["quoted"] {x}'},
+            {"start": 1.6, "duration": 0.9, "text": "bye"},
+        ]
+
+
+def test_vtt_rolling_lines_are_emitted_once():
+    body = (
+        "WEBVTT\nKind: captions\nLanguage: en\n\n"
+        "00:00:00.000 --> 00:00:02.000 align:start position:0%\n \nfirst<00:00:00.500><c> line</c>\n\n"
+        "00:00:02.000 --> 00:00:02.010 align:start position:0%\nfirst line\n \n\n"
+        "00:00:02.010 --> 00:00:04.000 align:start position:0%\nfirst line\nsecond<00:00:02.500><c> line</c>\n\n"
+        "00:00:04.000 --> 00:00:04.010 align:start position:0%\nsecond line\n \n\n"
+        "00:00:04.010 --> 00:00:06.000\r\nsecond line\r\n<v Speaker>third line</v>\r\n"
+    ).encode("utf-8")
+    expected = [
+        {"start": 0.0, "duration": 2.0, "text": "first line"},
+        {"start": 2.01, "duration": 1.99, "text": "second line"},
+        {"start": 4.01, "duration": 1.99, "text": "third line"},
+    ]
+    for size in (1, 3, len(body)):
+        assert parse_caption_stream(split(body, size), "vtt") == expected
+
+
+def test_ttml_offsets_and_line_breaks():
+    body = (b'<tt xmlns="http://www.w3.org/ns/ttml"><body><div>'
+            b'<p begin="1.5s" end="3s">two<br/>lines</p><p begin="00:00:03.000" dur="1500ms">next</p>'
+            b'</div></body></tt>')
+    assert parse_caption_stream(split(body, 4), "ttml") == [
+        {"start": 1.5, "duration": 1.5, "text": "two lines"},
+        {"start": 3.0, "duration": 1.5, "text": "next"},
+    ]
+
+
+def test_xml_parser_detaches_finished_cues():
+    body = load("srv3")
+    parser = XMLCaptionParser()
+    cut = body.rindex(b"</body>")
+    for chunk in split(body[:cut], 4096):
+        parser.feed(chunk)
+    root = parser._open[0]
+    # Only the open containers and the non-cue head/window elements remain
+    assert sum(1 for _ in root.iter()) < 10
+    parser.feed(body[cut:])
+    assert len(parser.close()) == 47
+
+
+def test_parsers_for_every_preferred_format():
+    for ext in FORMATS:
+        assert get_caption_parser(ext) is not None
+    tracks = [{"ext": "ttml", "url": "u1"}, {"ext": "srv3", "url": "u2"}, {"ext": "json", "url": "u3"}]
+    assert pick_caption_track(tracks)["ext"] == "srv3"
+    assert pick_caption_track(tracks[:1])["ext"] == "ttml"
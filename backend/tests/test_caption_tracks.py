@@ -0,0 +1,162 @@
+"""Caption track resolution against info_dict fixtures and a local caption
+server standing in for youtube.com/api/timedtext (user-024).
+
+The fixtures keep only the fields this service reads (subtitles and
+automatic_captions) in the shape yt-dlp returns them, with track URLs
+pointing at "{server}".
+"""
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+import caption_tracks
+import video_QA
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+BODIES = {
+    "srv1": b'<?xml version="1.0" encoding="utf-8" ?><transcript>'
+            b'<text start="0.5" dur="2.1">hello and welcome</text>'
+            b'<text start="2.6" dur="3">today we look at &amp;caching</text></transcript>',
+    "json3": json.dumps({"wireMagic": "pb3", "events": [
+        {"tStartMs": 0, "dDurationMs": 1500, "segs": [{"utf8": "こんにちは"}]},
+        {"tStartMs": 1500, "dDurationMs": 2000, "segs": [{"utf8": "今日は"}, {"utf8": "キャッシュ"}]},
+    ]}).encode("utf-8"),
+}
+
+
+class CaptionServer:
+    def __init__(self):
+        self.requests = []
+        self.reject_next = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                query = parse_qs(urlparse(self.path).query)
+                fmt = query.get("fmt", [""])[0]
+                server.requests.append(fmt)
+                if server.reject_next:
+                    server.reject_next -= 1
+                    self.send_response(403)
+                    self.end_headers()
+                    return
+                body = BODIES.get(fmt)
+                self.send_response(200 if body else 404)
+                self.end_headers()
+                self.wfile.write(body or b"")
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def server():
+    server = CaptionServer()
+    yield server
+    server.close()
+
+
+def load_info(name, server_url="http://127.0.0.1:9"):
+    with open(os.path.join(FIXTURES, f"{name}.json")) as f:
+        return json.loads(f.read().replace("{server}", server_url))
+
+
+@pytest.fixture
+def extractions(monkeypatch, server):
+    """Serve fixtures instead of running yt-dlp; records each extraction."""
+    calls = []
+
+    def extract(video_id):
+        calls.append(video_id)
+        name = {"fixtureMan01": "info_manual_and_auto", "fixtureJa002": "info_auto_only"}.get(video_id, "info_no_captions")
+        return load_info(name, server.url)
+
+    monkeypatch.setattr(video_QA, "resolve_caption_tracks",
+                        lambda video_id: caption_tracks.resolve_caption_tracks(video_id, extract=extract))
+    yield calls
+    for video_id in ("fixtureMan01", "fixtureJa002", "fixtureNone3"):
+        caption_tracks.invalidate_caption_tracks(video_id)
+
+
+def test_tracks_from_info_dict_fixtures():
+    resolved = caption_tracks.tracks_from_info(load_info("info_manual_and_auto"))
+    tracks = resolved["tracks"]
+    assert resolved["expires_at"] == 1893456000
+    # Manual subtitles precede automatic captions in the same language
+    assert [track["automatic"] for track in tracks["en"]] == [False] * 7 + [True] * 7
+    assert caption_tracks.choose_caption_track(tracks)[0] == "en-orig"
+    assert caption_tracks.choose_caption_track(tracks)[1]["ext"] == "srv1"
+    assert caption_tracks.choose_caption_track(tracks, ("en",))[1]["automatic"] is False
+
+    auto_only = caption_tracks.tracks_from_info(load_info("info_auto_only"))["tracks"]
+    lang, track = caption_tracks.choose_caption_track(auto_only)
+    assert (lang, track["ext"]) == ("ja-orig", "json3")
+
+
+def test_fetch_transcript_downloads_the_cheapest_track(server, extractions):
+    captions = video_QA.fetch_transcript("fixtureMan01")
+    assert [caption["text"] for caption in captions] == ["hello and welcome", "today we look at &caching"]
+    assert captions[0]["start"] == 0.5
+    assert server.requests == ["srv1"]
+
+    # The resolved tracks are cached: no second extraction
+    video_QA.fetch_transcript("fixtureMan01")
+    assert extractions == ["fixtureMan01"]
+
+
+def test_fetch_transcript_falls_back_to_other_languages(server, extractions):
+    captions = video_QA.fetch_transcript("fixtureJa002")
+    assert [caption["text"] for caption in captions] == ["こんにちは", "今日はキャッシュ"]
+    assert server.requests == ["json3"]
+
+
+def test_video_without_captions(server, extractions):
+    assert video_QA.fetch_transcript("fixtureNone3") == []
+    assert server.requests == []
+
+
+def test_rejected_cached_url_is_resolved_again(server, extractions):
+    server.reject_next = 1
+    captions = video_QA.fetch_transcript("fixtureMan01")
+    assert len(captions) == 2
+    assert extractions == ["fixtureMan01", "fixtureMan01"]
+    assert server.requests == ["srv1", "srv1"]
+
+
+def test_extractor_skips_manifests_and_player_js(monkeypatch):
+    seen = {}
+
+    class FakeYoutubeDL:
+        def __init__(self, opts):
+            seen["opts"] = opts
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def extract_info(self, url, download=True, process=True):
+            seen.update(url=url, download=download, process=process)
+            return load_info("info_no_captions")
+
+    monkeypatch.setattr(caption_tracks.yt_dlp, "YoutubeDL", FakeYoutubeDL)
+    caption_tracks.extract_caption_info("fixtureNone3")
+
+    assert seen["process"] is False and seen["download"] is False
+    youtube_args = seen["opts"]["extractor_args"]["youtube"]
+    assert {"hls", "dash"} <= set(youtube_args["skip"])
+    assert {"js", "configs"} <= set(youtube_args["player_skip"])
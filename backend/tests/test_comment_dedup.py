@@ -0,0 +1,128 @@
+"""Near-duplicate comment collapsing (user-018)."""
+import asyncio
+
+import comment_QA
+from comment_dedup import NearDuplicateIndex, get_comment_dedup_stats
+
+
+def _comment(i, text, likes=0, published="2024-01-01T00:00:00Z"):
+    return {"CommentId": f"c{i}", "ParentId": None, "Author": f"@u{i}", "CommentText": text,
+            "LikeCount": likes, "PublishDate": published, "AuthorLogoUrl": "", "SortBy": "time"}
+
+
+def test_collapsing_never_adds_tokens():
+    samples = ["first", "First!", "first!!", "lol", "LOL", "nice", "nice.", "wow", "wow!", "hi", "Hi"]
+    index = NearDuplicateIndex()
+    for i, text in enumerate(samples):
+        index.add(text, f"@u{i}: {text} (Likes: 0)")
+    stats = index.stats()
+    assert stats["input_comments"] == len(samples)
+    assert stats["output_comments"] == len(index.groups) < len(samples)
+    assert stats["collapsed_comments"] == len(samples) - len(index.groups)
+    assert stats["estimated_output_tokens"] <= stats["estimated_input_tokens"]
+
+
+def test_processing_records_the_reduction():
+    comments = [_comment(i, "this video changed my life, thank you so much for making it") for i in range(10)]
+    comments.append(_comment(10, "a different comment about the sound mixing in the second half"))
+    before = get_comment_dedup_stats()
+    comment_QA.cache["stats-test"] = {"Comments": comments}
+    try:
+        processed = comment_QA.ensure_processed_comments("stats-test")
+    finally:
+        comment_QA.clear_cache("stats-test")
+    after = get_comment_dedup_stats()
+
+    assert len(processed) == 2
+    assert after["runs"] == before["runs"] + 1
+    assert after["input_comments"] - before["input_comments"] == 11
+    assert after["output_comments"] - before["output_comments"] == 2
+    saved = (after["estimated_input_tokens"] - before["estimated_input_tokens"]) - \
+            (after["estimated_output_tokens"] - before["estimated_output_tokens"])
+    assert saved > 0
+    assert 0 < after["token_reduction_ratio"] < 1
+
+
+def test_large_groups_are_annotated():
+    index = NearDuplicateIndex()
+    for i in range(20):
+        index.add("this video changed my life, thank you", f"@u{i}: this video changed my life, thank you (Likes: 2)", likes=2)
+    assert index.render() == ["@u0: this video changed my life, thank you (Likes: 2) [+19 similar, 40 likes]"]
+
+
+def test_collapse_filters_each_batch_with_the_filter_engine(monkeypatch):
+    calls = []
+    real = comment_QA.filter_comments
+
+    def recording(comments, **kwargs):
+        calls.append(len(comments))
+        return real(comments, **kwargs)
+
+    monkeypatch.setattr(comment_QA, "filter_comments", recording)
+    index = comment_QA.collapse_comments([
+        _comment(0, "great explanation of the topic"),
+        _comment(1, "0:00 1:10 2:20 3:30 4:40 lol"),
+        _comment(2, "def f(x):\n    return x == 1\n    y = [x]\nclass A: pass"),
+        _comment(3, "the part about caching was the best bit"),
+    ])
+    assert calls == [4]
+    assert [group["payload"] for group in index.groups] == [
+        "@u0: great explanation of the topic (Likes: 0)",
+        "@u3: the part about caching was the best bit (Likes: 0)",
+    ]
+
+
+def test_refreshed_comments_collapse_into_existing_ones(monkeypatch):
+    cached = [_comment(i, text, 1, f"2024-01-01T00:00:0{i}Z") for i, text in
+              enumerate(["amazing video as always", "who is watching in 2024", "the intro music slaps"])]
+    new = [_comment(10, "Who is watching in 2024?", 3, "2024-02-01T00:00:00Z"),
+           _comment(11, "a completely new thought about the ending", 1, "2024-02-01T00:00:01Z")]
+
+    async def only_new(video_id, order="relevance", max_comments=None, budget=None, include_replies=False, seen=None):
+        yield new + cached[::-1]
+
+    monkeypatch.setattr(comment_QA, "iter_comment_batches", only_new)
+    comment_QA.cache["dedup-test"] = {"Comments": cached}
+    try:
+        processed = comment_QA.ensure_processed_comments("dedup-test")
+        assert len(processed) == 3
+        result = asyncio.run(comment_QA.refresh_comments("dedup-test"))
+        processed = comment_QA.cache["dedup-test"]["ProcessedComments"]
+    finally:
+        comment_QA.clear_cache("dedup-test")
+
+    assert result["new_comments"] == 2
+    assert result["new_processed_comments"] == 1
+    assert processed[3:] == ["@u11: a completely new thought about the ending (Likes: 1)"]
+
+
+class RecordingChain:
+    def __init__(self):
+        self.inputs = None
+
+    async def ainvoke(self, inputs):
+        self.inputs = inputs
+        return {"output_text": "stub summary"}
+
+
+def test_summary_selects_from_recorded_meta_without_recollapsing(monkeypatch):
+    comments = [_comment(i, f"distinct opinion number {i} about the video", likes=i) for i in range(5)]
+    comments.append(_comment(9, "distinct opinion number 4 about the video!", likes=100, published="2024-03-01T00:00:00Z"))
+    chain = RecordingChain()
+    monkeypatch.setattr(comment_QA, "load_summarize_chain", lambda **kwargs: chain)
+    comment_QA.cache["meta-test"] = {"Comments": comments}
+    try:
+        comment_QA.ensure_processed_comments("meta-test")
+        meta = comment_QA.cache["meta-test"]["ProcessedCommentMeta"]
+
+        def no_collapse(*args, **kwargs):
+            raise AssertionError("summary re-collapsed the raw comments")
+        monkeypatch.setattr(comment_QA, "collapse_comments", no_collapse)
+        summary = asyncio.run(comment_QA.summarize_comments("meta-test"))
+    finally:
+        comment_QA.clear_cache("meta-test")
+
+    assert summary == "stub summary"
+    assert meta[4] == {"likes": 104, "published": "2024-03-01T00:00:00Z"}
+    # The most liked representative leads the prompt
+    assert chain.inputs[0].page_content.startswith("@u4: distinct opinion number 4")
@@ -0,0 +1,35 @@
+"""Comment filter engine against the original per-comment filters (user-017)."""
+import pytest
+
+from bench.bench_comment_filter import make_corpus, old_clean_and_filter_comment, old_process_comments
+from comment_filter import clean_and_filter_comment, filter_comments
+
+EDGE_CASES = [
+    "",
+    "   ",
+    "https://only.link/abc",
+    "watch www.example.org and https://a.b/c now",
+    "0:10 1:20 2:30 3:40",
+    "0:10 1:20 2:30 3:40 4:50 lol",
+    "0:10 intro\n1:20 setup\n2:30 demo\n3:40 wrap up\n4:50 outro",
+    "def f(x):\n    return x == 1\n    y = [x]\nclass A: pass",
+    "x = {a: [1]} -> y == z",
+    "lambda and return, but a = b only once",
+    "    indented\n    twice\nthird line = {}",
+    "great video, thanks!",
+    "ratio 1:2:3:4:5 is 12:34:56",
+]
+
+
+@pytest.mark.parametrize("comment", EDGE_CASES)
+def test_edge_cases_match_the_original_filter(comment):
+    assert clean_and_filter_comment(comment) == old_clean_and_filter_comment(comment)
+
+
+def test_corpus_matches_the_original_filter():
+    corpus = make_corpus(5000)
+    assert filter_comments(corpus) == old_process_comments(corpus)
+    # keep_dropped lines up with the input
+    kept = filter_comments(corpus, keep_dropped=True)
+    assert len(kept) == len(corpus)
+    assert kept == [old_clean_and_filter_comment(comment) for comment in corpus]
@@ -0,0 +1,120 @@
+"""Incremental comment refresh (user-016)."""
+import asyncio
+
+import comment_QA
+
+
+def _item(comment_id, published, text=None):
+    return {"snippet": {"totalReplyCount": 0, "topLevelComment": {"id": comment_id, "snippet": {
+        "authorDisplayName": "@viewer",
+        "textOriginal": text or f"comment number {comment_id} with some words",
+        "likeCount": 1,
+        "publishedAt": published,
+        "authorProfileImageUrl": "",
+    }}}}
+
+
+def _cached(comment_id, published):
+    return comment_QA.comment_record(_item(comment_id, published)["snippet"]["topLevelComment"], "time")
+
+
+def _pages(pages, requests):
+    async def fetch(video_id, max_results=100, order="relevance", page_token=None, part="snippet"):
+        index = int(page_token or 0)
+        requests.append(index)
+        data = {"items": pages[index]}
+        if index + 1 < len(pages):
+            data["nextPageToken"] = str(index + 1)
+        return data
+    return fetch
+
+
+def _refresh(monkeypatch, cached, pages):
+    requests = []
+    monkeypatch.setattr(comment_QA, "fetch_comments_data", _pages(pages, requests))
+    comment_QA.cache["refresh-test"] = {"Comments": cached}
+    try:
+        result = asyncio.run(comment_QA.refresh_comments("refresh-test"))
+        comments = comment_QA.cache["refresh-test"]["Comments"]
+    finally:
+        comment_QA.clear_cache("refresh-test")
+    return result, requests, comments
+
+
+def test_page_of_only_cached_comments_stops_the_refresh(monkeypatch):
+    cached = [_cached(f"c{i}", f"2024-01-01T00:00:{59 - i:02d}Z") for i in range(60)]
+    pages = [[_item(f"c{i}", f"2024-01-01T00:00:{59 - i:02d}Z") for i in range(j, j + 10)] for j in range(0, 60, 10)]
+
+    result, requests, comments = _refresh(monkeypatch, cached, pages)
+
+    assert requests == [0]
+    assert result["new_comments"] == 0
+    assert len(comments) == 60
+
+
+def test_new_comments_are_collected_until_cached_history(monkeypatch):
+    cached = [_cached(f"c{i}", f"2024-01-01T00:00:{59 - i:02d}Z") for i in range(20)]
+    new = [_item(f"n{i}", f"2024-01-02T00:00:{59 - i:02d}Z") for i in range(15)]
+    old = [_item(f"c{i}", f"2024-01-01T00:00:{59 - i:02d}Z") for i in range(20)]
+    pages = [new[:10], new[10:] + old[:5], old[5:15], old[15:]]
+
+    result, requests, comments = _refresh(monkeypatch, cached, pages)
+
+    assert requests == [0, 1]
+    assert result["new_comments"] == 15
+    assert [c["CommentId"] for c in comments[20:]] == [f"n{i}" for i in range(15)]
+
+
+def test_comment_in_the_same_second_as_the_newest_cached_one_is_new(monkeypatch):
+    cached = [_cached(f"c{i}", f"2024-01-01T00:00:{59 - i:02d}Z") for i in range(10)]
+    same_second = _item("n0", "2024-01-01T00:00:59Z", "posted in the same second as the newest")
+    old = [_item(f"c{i}", f"2024-01-01T00:00:{59 - i:02d}Z") for i in range(10)]
+    pages = [[old[0], same_second] + old[1:5], old[5:]]
+
+    result, requests, comments = _refresh(monkeypatch, cached, pages)
+
+    assert requests == [0]
+    assert result["new_comments"] == 1
+    assert [c["CommentId"] for c in comments[10:]] == ["n0"]
+
+
+class StubChain:
+    def __init__(self, inputs):
+        self.inputs = inputs
+
+    async def ainvoke(self, docs):
+        self.inputs.append(docs[0].page_content)
+        return {"output_text": "updated summary"}
+
+
+def test_summary_update_uses_current_likes_and_records_its_input(monkeypatch):
+    cached = [_cached("c0", "2024-01-01T00:00:00Z")]
+    new = [_item("n0", "2024-01-02T00:00:01Z", "the section on eviction policies was really clear")]
+    later = [_item(f"m{i}", f"2024-01-03T00:00:{i:02d}Z", "the section on eviction policies was really clear!")
+             for i in range(3)]
+    inputs, selected = [], []
+    monkeypatch.setattr(comment_QA, "load_summarize_chain", lambda llm, chain_type, prompt: StubChain(inputs))
+    select = comment_QA.select_comments
+    monkeypatch.setattr(comment_QA, "select_comments", lambda items: (selected.append(items), select(items))[1])
+    monkeypatch.setattr(comment_QA, "fetch_comments_data", _pages([new], []))
+    comment_QA.cache["refresh-test"] = {"Comments": cached, "Summary": "old summary"}
+    try:
+        asyncio.run(comment_QA.refresh_comments("refresh-test"))
+        pending = comment_QA.cache["refresh-test"]["PendingComments"]
+        assert [(item["group"], item["likes"]) for item in pending] == [(1, 1)]
+
+        # Later copies collapse into the pending representative before the update runs
+        monkeypatch.setattr(comment_QA, "fetch_comments_data", _pages([later], []))
+        result = asyncio.run(comment_QA.refresh_comments("refresh-test"))
+        assert result["new_processed_comments"] == 0
+
+        summary = asyncio.run(comment_QA.summarize_comments("refresh-test"))
+        entry = comment_QA.cache["refresh-test"]
+    finally:
+        comment_QA.clear_cache("refresh-test")
+
+    assert summary == "updated summary" and "PendingComments" not in entry
+    assert len(inputs) == 1 and "eviction policies" in inputs[0]
+    assert entry["SummaryInput"]["delta_update"] is True
+    assert entry["SummaryInput"]["comments_included"] == 1
+    assert [(item["likes"], item["published"]) for item in selected[0]] == [(4, "2024-01-03T00:00:02Z")]
@@ -0,0 +1,68 @@
+"""/search latency while LLM summaries are in flight (user-008)."""
+import asyncio
+import statistics
+import time
+
+import httpx
+
+import main
+import video_QA
+
+SUMMARY_SECONDS = 1.0
+CONCURRENT_SUMMARIES = 8
+
+
+class SleepingChain:
+    """Stands in for a Gemini summary chain: slow, but awaits instead of blocking."""
+
+    async def ainvoke(self, inputs):
+        await asyncio.sleep(SUMMARY_SECONDS)
+        return {"output_text": "stub summary"}
+
+
+async def _fake_search(query, max_results=5, page_token=None):
+    return [{"Title": query}], None
+
+
+async def _fake_transcript(video_id):
+    return "(00:00:00) hello world"
+
+
+async def _search_latencies(client, count=20):
+    latencies = []
+    for i in range(count):
+        start = time.perf_counter()
+        response = await client.get("/search", params={"query": f"q{i}"})
+        latencies.append(time.perf_counter() - start)
+        assert response.status_code == 200
+    return latencies
+
+
+def test_search_latency_flat_while_summaries_run(monkeypatch):
+    monkeypatch.setattr(main, "search_youtube", _fake_search)
+    monkeypatch.setattr(video_QA, "load_transcript", _fake_transcript)
+    monkeypatch.setattr(video_QA, "load_summarize_chain", lambda **kwargs: SleepingChain())
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            idle = await _search_latencies(client)
+
+            summaries = [
+                asyncio.create_task(client.get(f"/video/summarize/load-test-{i}"))
+                for i in range(CONCURRENT_SUMMARIES)
+            ]
+            await asyncio.sleep(0.05)
+            busy = await _search_latencies(client)
+            in_flight = sum(not task.done() for task in summaries)
+            responses = await asyncio.gather(*summaries)
+        return idle, busy, in_flight, responses
+
+    idle, busy, in_flight, responses = asyncio.run(scenario())
+
+    # Searches finished while the summaries were still running
+    assert in_flight == CONCURRENT_SUMMARIES
+    assert all(response.status_code == 200 for response in responses)
+    # A blocking LLM call would push each search to ~SUMMARY_SECONDS
+    assert max(busy) < SUMMARY_SECONDS / 4
+    assert statistics.median(busy) < statistics.median(idle) * 5 + 0.01
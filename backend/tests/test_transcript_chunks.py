@@ -0,0 +1,54 @@
+"""Time-aligned transcript chunks for the video vectorstore (user-022)."""
+from transcript_store import TranscriptIndex
+from video_QA import chunk_transcript
+
+
+def _index(count, spacing=5.0):
+    # Each segment text is 39 characters: 10 estimated tokens
+    return TranscriptIndex.from_captions([
+        {"start": i * spacing, "duration": spacing, "text": f"s{i:02} " + "x" * 35}
+        for i in range(count)
+    ])
+
+
+def test_chunks_close_at_the_token_budget():
+    index = _index(10)
+    assert all(len(index.segment_text(i)) // 4 + 1 == 10 for i in range(len(index)))
+
+    chunks = chunk_transcript(index, max_tokens=30, max_seconds=1000)
+
+    assert [chunk.metadata for chunk in chunks] == [
+        {"start": 0.0, "end": 15.0}, {"start": 15.0, "end": 30.0},
+        {"start": 30.0, "end": 45.0}, {"start": 45.0, "end": 50.0},
+    ]
+    assert chunks[0].page_content.startswith("(00:00:00 - 00:00:15) s00 ")
+    assert chunks[1].page_content.startswith("(00:00:15 - 00:00:30) s03 ")
+    # Whole segments, no overlap, nothing dropped
+    assert " ".join(chunk.page_content.split(") ", 1)[1] for chunk in chunks) == index.clean()
+
+
+def test_chunks_close_at_the_time_span():
+    index = _index(8, spacing=40.0)
+
+    chunks = chunk_transcript(index, max_tokens=1000, max_seconds=100)
+
+    # A segment starting more than max_seconds after the chunk's first one opens a new chunk
+    assert [(chunk.metadata["start"], chunk.metadata["end"]) for chunk in chunks] == [
+        (0.0, 120.0), (120.0, 240.0), (240.0, 320.0),
+    ]
+    assert chunks[2].page_content.startswith("(00:04:00 - 00:05:20) s06 ")
+
+
+def test_oversized_segment_is_its_own_chunk():
+    index = TranscriptIndex.from_captions([
+        {"start": 0.0, "duration": 2.0, "text": "short"},
+        {"start": 2.0, "duration": 30.0, "text": "long " * 100},
+        {"start": 32.0, "duration": 1.0, "text": "after"},
+    ])
+
+    chunks = chunk_transcript(index, max_tokens=50, max_seconds=1000)
+
+    assert [chunk.metadata for chunk in chunks] == [
+        {"start": 0.0, "end": 2.0}, {"start": 2.0, "end": 32.0}, {"start": 32.0, "end": 33.0},
+    ]
+    assert chunk_transcript(TranscriptIndex.from_captions([])) == []
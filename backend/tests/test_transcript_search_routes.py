@@ -0,0 +1,97 @@
+"""Transcript search routes (user-025)."""
+import asyncio
+
+import httpx
+
+import main
+import video_QA
+from transcript_store import TranscriptIndex
+
+
+def _get(path, **params):
+    async def request():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get(path, params=params)
+    return asyncio.run(request())
+
+
+def test_cross_video_search_is_not_shadowed_by_video_details(monkeypatch):
+    async def no_video_lookup(video_id):
+        raise AssertionError(f"/video/{{video_id}} handled the request for {video_id!r}")
+
+    monkeypatch.setattr(main, "search_video", no_video_lookup)
+    video_QA.video_cache["route-test"] = {"TranscriptIndex": TranscriptIndex.from_captions([
+        {"start": 0.0, "duration": 2.0, "text": "welcome back to the channel"},
+        {"start": 2.0, "duration": 3.0, "text": "today we talk about inverted indexes"},
+    ])}
+    try:
+        response = _get("/video/search", q='"inverted indexes"')
+    finally:
+        video_QA.clear_video_cache("route-test")
+
+    assert response.status_code == 200
+    hits = response.json()["results"]["route-test"]["hits"]
+    assert [hit["start_ms"] for hit in hits] == [2000]
+
+
+def test_video_details_route_still_matches_ids(monkeypatch):
+    async def fake_video(video_id):
+        return {"VideoId": video_id}
+
+    monkeypatch.setattr(main, "search_video", fake_video)
+    response = _get("/video/abc123")
+    assert response.json() == {"results": {"VideoId": "abc123"}}
+
+
+CAPTIONS = [
+    {"start": 0.0, "duration": 2.5, "text": "the trick is a consistent"},
+    {"start": 2.5, "duration": 2.0, "text": "hashing ring so keys"},
+    {"start": 4.5, "duration": 3.0, "text": "move rarely when nodes join"},
+]
+
+
+def test_video_search_finds_phrases_across_segment_boundaries(monkeypatch):
+    monkeypatch.setattr(video_QA, "fetch_transcript", lambda video_id, preferred_langs=None, cancel_event=None: CAPTIONS)
+    try:
+        response = _get("/video/search/route-fetch", q='"consistent hashing" "keys move"', require_all="false")
+    finally:
+        video_QA.clear_video_cache("route-fetch")
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert results["clauses"] == ["consistent hashing", "keys move"]
+    # A phrase is reported at the segment where it starts
+    assert [(hit["start_ms"], hit["matched"], hit["positions"]) for hit in results["hits"]] == [
+        (0, ["consistent hashing"], [4]),
+        (2500, ["keys move"], [3]),
+    ]
+
+
+def test_video_search_without_a_transcript_is_404(monkeypatch):
+    monkeypatch.setattr(video_QA, "fetch_transcript", lambda video_id, preferred_langs=None, cancel_event=None: [])
+    try:
+        response = _get("/video/search/route-empty", q="anything")
+    finally:
+        video_QA.clear_video_cache("route-empty")
+
+    assert response.status_code == 404
+    assert response.json()["results"] is None
+
+
+def test_cross_video_search_skips_entries_without_transcripts_and_keeps_lru_order():
+    video_QA.video_cache["route-a"] = {"TranscriptIndex": TranscriptIndex.from_captions(CAPTIONS)}
+    video_QA.video_cache["route-b"] = {"Summary": "no transcript cached"}
+    video_QA.video_cache["route-c"] = {"TranscriptIndex": TranscriptIndex.from_captions(CAPTIONS[:1])}
+    order = [video_id for video_id, _ in video_QA.video_cache.peek_items()]
+    try:
+        response = _get("/video/search", q='"hashing ring"')
+        after = [video_id for video_id, _ in video_QA.video_cache.peek_items()]
+        stored = "SearchIndex" in video_QA.video_cache.peek_items()[-1][1]
+    finally:
+        for video_id in ("route-a", "route-b", "route-c"):
+            video_QA.clear_video_cache(video_id)
+
+    assert response.status_code == 200
+    assert list(response.json()["results"]) == ["route-a"]
+    assert after == order and not stored
@@ -0,0 +1,78 @@
+"""Transcript segments by time window (user-021)."""
+import asyncio
+
+import httpx
+
+import main
+import video_QA
+from transcript_store import TranscriptIndex
+
+CAPTIONS = [
+    {"start": 0.0, "duration": 2.0, "text": "zero"},
+    {"start": 2.0, "duration": 2.0, "text": "two"},
+    {"start": 4.0, "duration": 2.0, "text": "four"},
+    {"start": 6.0, "duration": 2.0, "text": "six"},
+]
+
+
+def test_window_boundaries():
+    index = TranscriptIndex.from_captions(CAPTIONS)
+
+    assert index.window() == (0, 4)
+    assert index.window(0, 0) == (0, 1)
+    # A segment ending exactly at start_time is not included; one starting at end_time is
+    assert index.window(2.0, 4.0) == (1, 3)
+    assert index.window(3.0, 3.5) == (1, 2)
+    assert index.window(None, 1.0) == (0, 1)
+    assert index.window(5.0, None) == (2, 4)
+    assert index.window(8.0, 20.0) == (4, 4)
+    assert index.window(-5.0, -1.0) == (0, 0)
+    assert TranscriptIndex.from_captions([]).window(1.0, 2.0) == (0, 0)
+
+
+def test_window_reaches_back_to_long_overlapping_segments():
+    index = TranscriptIndex.from_captions([
+        {"start": 0.0, "duration": 60.0, "text": "music plays under everything"},
+        {"start": 10.0, "duration": 1.0, "text": "hello"},
+        {"start": 20.0, "duration": 1.0, "text": "world"},
+        {"start": 70.0, "duration": 1.0, "text": "after the music"},
+    ])
+
+    # The segment just before 30s ended long ago; the first one is still playing
+    assert index.window(30.0, 40.0) == (0, 3)
+    assert index.segments(30.0, 40.0)[0]["text"] == "music plays under everything"
+    assert index.window(65.0, 75.0) == (3, 4)
+
+
+def _get(path, **params):
+    async def request():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get(path, params=params)
+    return asyncio.run(request())
+
+
+def test_segment_endpoint(monkeypatch):
+    monkeypatch.setattr(video_QA, "fetch_transcript", lambda video_id, preferred_langs=None, cancel_event=None: CAPTIONS)
+    try:
+        response = _get("/video/transcript/window-test/segment", start=3, end=5)
+        reversed_window = _get("/video/transcript/window-test/segment", start=5, end=3)
+    finally:
+        video_QA.clear_video_cache("window-test")
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [segment["text"] for segment in results["segments"]] == ["two", "four"]
+    assert results["text"] == "(00:00:02) two (00:00:04) four"
+    assert reversed_window.status_code == 400
+
+
+def test_segment_endpoint_without_a_transcript_is_404(monkeypatch):
+    monkeypatch.setattr(video_QA, "fetch_transcript", lambda video_id, preferred_langs=None, cancel_event=None: [])
+    try:
+        response = _get("/video/transcript/window-empty/segment", start=0, end=10)
+    finally:
+        video_QA.clear_video_cache("window-empty")
+
+    assert response.status_code == 404
+    assert response.json()["results"] is None
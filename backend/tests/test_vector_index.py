@@ -0,0 +1,58 @@
+"""Saved FAISS index versions (user-012)."""
+import os
+
+from langchain.embeddings.base import Embeddings
+
+import vector_index
+
+
+class FakeVectorstore:
+    def __init__(self, label):
+        self.label = label
+
+    def save_local(self, folder):
+        with open(os.path.join(folder, "index.faiss"), "w") as f:
+            f.write(self.label)
+
+
+def test_saving_a_new_version_removes_the_others(tmp_path, monkeypatch):
+    monkeypatch.setattr(vector_index, "VECTOR_INDEX_DIR", str(tmp_path))
+    first = vector_index.index_path("comments", "vid", "model", "chunk_size=10", ["a", "b"])
+    second = vector_index.index_path("comments", "vid", "model", "chunk_size=10", ["a", "b", "c"])
+    other_video = vector_index.index_path("comments", "other", "model", "chunk_size=10", ["a"])
+    assert first != second
+
+    vector_index.save_vectorstore(FakeVectorstore("first"), first)
+    vector_index.save_vectorstore(FakeVectorstore("other"), other_video)
+    in_progress = tmp_path / "comments" / "vid" / ".tmp-writer"
+    in_progress.mkdir()
+    vector_index.save_vectorstore(FakeVectorstore("second"), second)
+
+    assert sorted(os.listdir(os.path.dirname(second))) == sorted([".tmp-writer", os.path.basename(second)])
+    assert os.path.exists(os.path.join(other_video, "index.faiss"))
+
+    # Saving an existing version again keeps it
+    vector_index.save_vectorstore(FakeVectorstore("second"), second)
+    assert os.path.exists(os.path.join(second, "index.faiss"))
+
+
+class HashEmbeddings(Embeddings):
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text):
+        return [float(len(text)), float(sum(map(ord, text)) % 97), 1.0]
+
+
+def test_loaded_index_can_be_extended(tmp_path, monkeypatch):
+    monkeypatch.setattr(vector_index, "VECTOR_INDEX_DIR", str(tmp_path))
+    embeddings = HashEmbeddings()
+    path = vector_index.index_path("comments", "vid", "hash", "chunk_size=10", ["first", "second"])
+    vectorstore = vector_index.FAISS.from_texts(["first", "second"], embeddings)
+    vector_index.save_vectorstore(vectorstore, path)
+
+    loaded = vector_index.load_vectorstore(path, embeddings)
+    # refresh_comments adds new comments to the loaded index in place
+    loaded.add_texts(["third"])
+    assert loaded.index.ntotal == 3
+    assert loaded.similarity_search("third", k=1)[0].page_content == "third"
@@ -0,0 +1,112 @@
+"""Map-reduce video summaries with a stub chain in place of Gemini (user-020)."""
+import asyncio
+import math
+import time
+
+import pytest
+
+import llm_runtime
+import video_QA
+
+
+def _long_transcript(lines=1500):
+    return "".join(
+        f"({i // 3600:02}:{i // 60 % 60:02}:{i % 60:02}) line {i} of a long lecture about distributed systems "
+        for i in range(lines)
+    )
+
+
+class StubChain:
+    """Section chains echo the section's first timestamp; the merge chain joins
+    the notes. `failures` maps a section's first timestamp to how many calls fail."""
+
+    def __init__(self, prompt, failures, calls, delay=0.0):
+        self.prompt = prompt
+        self.failures = failures
+        self.calls = calls
+        self.delay = delay
+
+    async def ainvoke(self, docs):
+        text = docs[0].page_content
+        await asyncio.sleep(self.delay)
+        if self.prompt is video_QA.merge_prompt:
+            self.calls.append("merge")
+            return {"output_text": "MERGED\n" + text}
+        start = video_QA._SECTION_START_RE.search(text).group(1)
+        self.calls.append(start)
+        if self.failures.get(start, 0) > 0:
+            self.failures[start] -= 1
+            raise RuntimeError(f"quota exceeded for {start}")
+        return {"output_text": f"notes from {start}"}
+
+
+@pytest.fixture
+def summarize(monkeypatch):
+    transcript = _long_transcript()
+    monkeypatch.setattr(video_QA, "VIDEO_SUMMARY_RETRY_DELAY", 0)
+
+    async def fake_load_transcript(video_id):
+        return transcript
+
+    monkeypatch.setattr(video_QA, "load_transcript", fake_load_transcript)
+
+    def run(failures):
+        calls = []
+        monkeypatch.setattr(video_QA, "load_summarize_chain",
+                            lambda llm, chain_type, prompt: StubChain(prompt, failures, calls))
+        try:
+            summary = asyncio.run(video_QA.summarize_video("map-reduce-test"))
+            cached = video_QA.video_cache.get("map-reduce-test", {}).get("Summary")
+        finally:
+            video_QA.clear_video_cache("map-reduce-test")
+        return summary, cached, calls
+
+    assert video_QA.estimate_tokens(transcript) > video_QA.VIDEO_SUMMARY_MAP_REDUCE_TOKENS
+    return run
+
+
+def test_sections_are_merged_in_order(summarize):
+    summary, cached, calls = summarize({})
+    section_starts = [call for call in calls if call != "merge"]
+    assert len(section_starts) >= 3 and calls[-1] == "merge"
+    assert summary == cached
+    notes = [line for line in summary.splitlines() if line.startswith("notes from")]
+    assert notes == [f"notes from {start}" for start in sorted(section_starts)]
+
+
+def test_failed_section_is_retried(summarize):
+    summary, cached, calls = summarize({"00:00:00": 2})
+    assert calls.count("00:00:00") == 3
+    assert "notes from 00:00:00" in summary
+    assert cached == summary
+
+
+def test_section_that_keeps_failing_is_an_error_and_not_cached(summarize):
+    summary, cached, calls = summarize({"00:00:00": 10})
+    assert "error" in summary and "quota exceeded" in summary["error"]
+    assert cached is None
+    assert "merge" not in calls
+
+
+def test_map_step_runs_sections_concurrently(monkeypatch):
+    delay = 0.05
+    transcript = _long_transcript(6000)
+    sections = len(video_QA.split_transcript_sections(transcript))
+    # Sections are also bounded by the process-wide LLM limit
+    concurrency = min(video_QA.VIDEO_SUMMARY_MAP_CONCURRENCY, llm_runtime.LLM_MAX_CONCURRENCY)
+    assert sections > 2 * concurrency
+
+    calls = []
+    monkeypatch.setattr(video_QA, "load_summarize_chain",
+                        lambda llm, chain_type, prompt: StubChain(prompt, {}, calls, delay))
+    start = time.perf_counter()
+    summary = asyncio.run(video_QA.map_reduce_summary(transcript))
+    elapsed = time.perf_counter() - start
+
+    assert calls.count("merge") == 1 and len(calls) == sections + 1
+    assert summary.count("notes from") == sections
+    # Map waves of `concurrency` calls, then the merge call
+    expected = (math.ceil(sections / concurrency) + 1) * delay
+    sequential = (sections + 1) * delay
+    assert expected * 0.9 <= elapsed < expected + 0.15
+    assert elapsed < sequential / 2
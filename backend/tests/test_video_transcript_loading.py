@@ -0,0 +1,30 @@
+"""Video QA must not fetch transcripts on the event loop (user-009)."""
+import asyncio
+import threading
+
+import video_QA
+from transcript_store import TranscriptIndex
+
+
+def test_answer_loads_missing_transcript_off_the_loop(monkeypatch):
+    video_id = "qa-transcript-missing"
+    video_QA.video_cache[video_id] = {"Summary": "cached summary"}
+    loop_thread = threading.get_ident()
+    fetch_threads = []
+
+    def fake_fetch(vid, preferred_langs=None, cancel_event=None):
+        fetch_threads.append(threading.get_ident())
+        return [{"start": 0.0, "duration": 2.0, "text": "hello world"}]
+
+    async def fake_vectorstore(vid, chunks):
+        raise RuntimeError("stop after chunking")
+
+    monkeypatch.setattr(video_QA, "fetch_transcript", fake_fetch)
+    monkeypatch.setattr(video_QA, "ensure_video_vectorstore", fake_vectorstore)
+
+    result = asyncio.run(video_QA.answer_video_question(video_id, "what is said?"))
+
+    assert fetch_threads and loop_thread not in fetch_threads
+    assert isinstance(video_QA.video_cache[video_id]["TranscriptIndex"], TranscriptIndex)
+    assert video_QA.video_cache[video_id]["TranscriptChunks"]
+    assert "error" in result and "vectorstore" in result["error"]
@@ -0,0 +1,77 @@
+import asyncio
+import threading
+import os
+from concurrent.futures import ThreadPoolExecutor
+import dotenv
+dotenv.load_dotenv()
+
+# yt-dlp extraction runs on its own small pool so it never blocks the event loop
+TRANSCRIPT_WORKERS = int(os.getenv('TRANSCRIPT_WORKERS', 2))
+TRANSCRIPT_MAX_PENDING = int(os.getenv('TRANSCRIPT_MAX_PENDING', 8))
+TRANSCRIPT_JOB_TIMEOUT = float(os.getenv('TRANSCRIPT_JOB_TIMEOUT', 60))
+
+_executor = ThreadPoolExecutor(max_workers=TRANSCRIPT_WORKERS, thread_name_prefix="transcript")
+_pending = 0
+_pending_lock = threading.Lock()
+_stats = {"submitted": 0, "completed": 0, "rejected": 0, "timed_out": 0, "failed": 0}
+
+class TranscriptJobError(Exception):
+    pass
+
+class TranscriptQueueFull(TranscriptJobError):
+    pass
+
+class TranscriptJobTimeout(TranscriptJobError):
+    pass
+
+async def run_transcript_job(func, *args, timeout=None):
+    """Run func(*args, cancel_event=...) on the transcript pool and await its result.
+
+    Rejects immediately when TRANSCRIPT_MAX_PENDING jobs are already queued or
+    running. On deadline the job is cancelled if still queued, or signalled
+    through cancel_event so it can stop at its next checkpoint.
+    """
+    global _pending
+    with _pending_lock:
+        if _pending >= TRANSCRIPT_MAX_PENDING:
+            _stats["rejected"] += 1
+            raise TranscriptQueueFull("Transcript queue is full, please retry shortly.")
+        _pending += 1
+    _stats["submitted"] += 1
+
+    cancel_event = threading.Event()
+    future = _executor.submit(func, *args, cancel_event=cancel_event)
+    # A job stays counted until its worker actually finishes, not just until we stop waiting
+    future.add_done_callback(_release_slot)
+    try:
+        result = await asyncio.wait_for(
+            asyncio.wrap_future(future),
+            timeout=timeout or TRANSCRIPT_JOB_TIMEOUT
+        )
+        _stats["completed"] += 1
+        return result
+    except asyncio.TimeoutError:
+        _stats["timed_out"] += 1
+        cancel_event.set()
+        future.cancel()
+        raise TranscriptJobTimeout("Transcript extraction timed out.")
+    except asyncio.CancelledError:
+        cancel_event.set()
+        future.cancel()
+        raise
+    except Exception:
+        _stats["failed"] += 1
+        raise
+
+def _release_slot(_future):
+    global _pending
+    with _pending_lock:
+        _pending -= 1
+
+def get_transcript_job_stats():
+    """Get queue depth and outcome counters for transcript jobs."""
+    stats = dict(_stats)
+    stats["pending"] = _pending
+    stats["workers"] = TRANSCRIPT_WORKERS
+    stats["max_pending"] = TRANSCRIPT_MAX_PENDING
+    return stats
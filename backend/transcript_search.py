@@ -0,0 +1,102 @@
+import re
+from array import array
+from bisect import bisect_left
+
+_TOKEN_RE = re.compile(r"\w+")
+_QUERY_RE = re.compile(r'"([^"]+)"|(\S+)')
+
+def tokenize(text):
+    return _TOKEN_RE.findall(text.lower())
+
+def parse_query(query):
+    """Split a query into clauses: quoted phrases stay together, other words
+    are single-term clauses. Each clause is a tuple of tokens."""
+    clauses = []
+    for phrase, word in _QUERY_RE.findall(query):
+        tokens = tuple(tokenize(phrase or word))
+        if tokens and tokens not in clauses:
+            clauses.append(tokens)
+    return clauses
+
+
+class TranscriptSearchIndex:
+    """Positional inverted index over one transcript's caption segments.
+
+    Tokens are numbered across the whole transcript so phrases may span
+    segment boundaries; `token_segments` maps a token position back to its
+    segment, whose start time becomes the hit's timestamp.
+    """
+    __slots__ = ("postings", "token_segments", "transcript")
+
+    def __init__(self, transcript):
+        self.transcript = transcript
+        self.postings = {}
+        self.token_segments = array("I")
+        position = 0
+        for i in range(len(transcript)):
+            for token in tokenize(transcript.segment_text(i)):
+                positions = self.postings.get(token)
+                if positions is None:
+                    positions = self.postings[token] = array("I")
+                positions.append(position)
+                self.token_segments.append(i)
+                position += 1
+
+    @property
+    def nbytes(self):
+        return (self.token_segments.itemsize * len(self.token_segments)
+                + sum(len(term) + positions.itemsize * len(positions) for term, positions in self.postings.items()))
+
+    def match(self, tokens):
+        """Start positions where the token sequence occurs."""
+        candidates = self.postings.get(tokens[0])
+        if candidates is None:
+            return []
+        if len(tokens) == 1:
+            return list(candidates)
+        matches = set(candidates)
+        for offset, token in enumerate(tokens[1:], 1):
+            positions = self.postings.get(token)
+            if positions is None:
+                return []
+            following = set(positions)
+            matches = {p for p in matches if p + offset in following}
+            if not matches:
+                return []
+        return sorted(matches)
+
+    def search(self, query, limit=20, require_all=False):
+        """Segments matching the query's terms/phrases, as timestamped hits.
+
+        Hits are ordered by the number of distinct clauses they match, then by
+        time. With require_all, a segment must match every clause.
+        """
+        clauses = parse_query(query)
+        by_segment = {}
+        for tokens in clauses:
+            for position in self.match(tokens):
+                segment = self.token_segments[position]
+                hit = by_segment.setdefault(segment, {"clauses": set(), "positions": []})
+                hit["clauses"].add(" ".join(tokens))
+                hit["positions"].append(position)
+
+        segments = by_segment.items()
+        if require_all:
+            segments = [(segment, hit) for segment, hit in segments if len(hit["clauses"]) == len(clauses)]
+        ranked = sorted(segments, key=lambda item: (-len(item[1]["clauses"]), item[0]))[:limit]
+
+        transcript = self.transcript
+        hits = []
+        for segment, hit in ranked:
+            start = transcript.starts[segment]
+            first_token = bisect_left(self.token_segments, segment)
+            hits.append({
+                "start_ms": int(round(start * 1000)),
+                "end_ms": int(round((start + transcript.durations[segment]) * 1000)),
+                "text": transcript.segment_text(segment),
+                "matched": sorted(hit["clauses"]),
+                # Word offsets of each match within the segment
+                "positions": sorted(position - first_token for position in hit["positions"]),
+            })
+        return {"query": query, "clauses": [" ".join(tokens) for tokens in clauses],
+                "total_segments": len(segments), "hits": hits}
@@ -0,0 +1,104 @@
+from array import array
+from bisect import bisect_left, bisect_right
+
+def format_timestamp(seconds):
+    total_seconds = int(seconds)
+    hours = total_seconds // 3600
+    minutes = (total_seconds % 3600) // 60
+    secs = total_seconds % 60
+    return f"({hours:02}:{minutes:02}:{secs:02})"
+
+
+class TranscriptIndex:
+    """Captions stored as parallel arrays: start times, durations and offsets
+    into one text buffer. Segment lookups by time are binary searches; the
+    formatted and clean transcript strings are built on demand.
+    """
+    __slots__ = ("starts", "durations", "offsets", "text", "max_ends")
+
+    def __init__(self, starts, durations, offsets, text):
+        self.starts = array("d", starts)
+        self.durations = array("d", durations)
+        self.offsets = array("q", offsets)
+        self.text = text
+        # Running maximum of segment end times: non-decreasing, so the first
+        # segment still playing at a given time is a binary search away
+        self.max_ends = array("d")
+        latest = float("-inf")
+        for start, duration in zip(self.starts, self.durations):
+            latest = max(latest, start + duration)
+            self.max_ends.append(latest)
+
+    @classmethod
+    def from_captions(cls, captions):
+        """Build from parsed captions ({'start', 'duration', 'text'} dicts)."""
+        captions = sorted(captions, key=lambda caption: caption['start'])
+        pieces = []
+        offsets = [0]
+        for caption in captions:
+            pieces.append(caption['text'])
+            offsets.append(offsets[-1] + len(caption['text']))
+        return cls(
+            [caption['start'] for caption in captions],
+            [caption['duration'] for caption in captions],
+            offsets,
+            "".join(pieces)
+        )
+
+    # JSON form for the shared (L2) artifact cache
+    def to_dict(self):
+        return {
+            "starts": self.starts.tolist(),
+            "durations": self.durations.tolist(),
+            "offsets": self.offsets.tolist(),
+            "text": self.text
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["starts"], data["durations"], data["offsets"], data["text"])
+
+    @property
+    def nbytes(self):
+        return (self.starts.itemsize * len(self.starts) + self.durations.itemsize * len(self.durations)
+                + self.max_ends.itemsize * len(self.max_ends)
+                + self.offsets.itemsize * len(self.offsets) + len(self.text.encode("utf-8")))
+
+    def __len__(self):
+        return len(self.starts)
+
+    def segment_text(self, i):
+        return self.text[self.offsets[i]:self.offsets[i + 1]]
+
+    @property
+    def end_time(self):
+        return self.starts[-1] + self.durations[-1] if self.starts else 0.0
+
+    def window(self, start_time=None, end_time=None):
+        """Index range [lo, hi) covering every segment overlapping
+        [start_time, end_time] seconds. A long segment still playing at
+        start_time pulls lo back to it, together with any shorter segments
+        that started after it."""
+        lo = 0
+        if start_time is not None:
+            # Earlier segments may still be playing at start_time
+            lo = min(bisect_left(self.starts, start_time), bisect_right(self.max_ends, start_time))
+        hi = len(self.starts) if end_time is None else bisect_right(self.starts, end_time)
+        return lo, max(lo, hi)
+
+    def segments(self, start_time=None, end_time=None):
+        lo, hi = self.window(start_time, end_time)
+        return [
+            {"start": self.starts[i], "duration": self.durations[i], "text": self.segment_text(i)}
+            for i in range(lo, hi)
+        ]
+
+    def formatted(self, lo=0, hi=None):
+        """Transcript as '(hh:mm:ss) text' lines joined by spaces, as fed to the LLM."""
+        hi = len(self.starts) if hi is None else hi
+        return " ".join(f"{format_timestamp(self.starts[i])} {self.segment_text(i)}" for i in range(lo, hi))
+
+    def clean(self, lo=0, hi=None):
+        """Transcript text without timestamps and with whitespace collapsed."""
+        hi = len(self.starts) if hi is None else hi
+        return " ".join(" ".join(self.segment_text(i) for i in range(lo, hi)).split())
@@ -0,0 +1,73 @@
+import os
+import pickle
+import shutil
+import tempfile
+from langchain.vectorstores import FAISS
+from cache_backends import artifact_version
+import dotenv
+dotenv.load_dotenv()
+
+# On-disk FAISS indexes shared by every worker: <dir>/<namespace>/<video_id>/<version>/
+# Only the most recently saved version of each video is kept.
+VECTOR_INDEX_DIR = os.getenv('VECTOR_INDEX_DIR', os.path.join('cache', 'faiss'))
+
+def index_path(namespace, video_id, embed_model, chunk_params, texts):
+    """Directory for one video's index, versioned by embedding model, chunking
+    parameters and a fingerprint of the indexed texts."""
+    fingerprint = artifact_version(*texts)
+    version = artifact_version(embed_model, chunk_params, fingerprint)
+    return os.path.join(VECTOR_INDEX_DIR, namespace, video_id, version)
+
+def _read_faiss_index(path):
+    import faiss
+    # Read into memory: IO_FLAG_MMAP still copies IndexFlat vectors, and the
+    # flat-codes mmap flag gives an index that aborts the process on add(),
+    # which refresh_comments relies on to extend a loaded index
+    return faiss.read_index(os.path.join(path, "index.faiss"))
+
+def load_vectorstore(path, embeddings):
+    """Load a saved vectorstore, or return None if it is missing or unreadable."""
+    if not os.path.exists(os.path.join(path, "index.faiss")):
+        return None
+    try:
+        index = _read_faiss_index(path)
+        with open(os.path.join(path, "index.pkl"), "rb") as f:
+            docstore, index_to_docstore_id = pickle.load(f)
+        return FAISS(embeddings, index, docstore, index_to_docstore_id)
+    except Exception as e:
+        print(f"Error loading vector index from {path}: {e}")
+        return None
+
+def save_vectorstore(vectorstore, path):
+    """Save atomically so concurrent workers never read a half-written index,
+    then delete the video's other versions."""
+    parent = os.path.dirname(path)
+    os.makedirs(parent, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(dir=parent, prefix=".tmp-")
+    try:
+        vectorstore.save_local(tmp_dir)
+        os.rename(tmp_dir, path)
+    except OSError as e:
+        # Another worker finished first; its copy is equivalent
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        if not os.path.exists(path):
+            print(f"Error saving vector index to {path}: {e}")
+            return
+    prune_vectorstores(path)
+
+def prune_vectorstores(path):
+    """Delete every saved version of path's video except path itself.
+    In-progress saves (.tmp- directories) are left alone."""
+    parent, keep = os.path.split(path)
+    try:
+        names = os.listdir(parent)
+    except OSError:
+        return
+    for name in names:
+        if name != keep and not name.startswith(".tmp-"):
+            shutil.rmtree(os.path.join(parent, name), ignore_errors=True)
+
+def remove_vectorstores(namespace, video_id=None):
+    """Delete saved indexes for one video or a whole namespace."""
+    target = os.path.join(VECTOR_INDEX_DIR, namespace, video_id) if video_id else os.path.join(VECTOR_INDEX_DIR, namespace)
+    shutil.rmtree(target, ignore_errors=True)
@@ -1,6 +1,7 @@
 import re
+import asyncio
 import yt_dlp
-from langchain_google_genai import GoogleGenerativeAIEmbeddings, ChatGoogleGenerativeAI
+from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain.vectorstores import FAISS
 from langchain.schema import Document
 from langchain.chains import RetrievalQA
@@ -11,115 +12,94 @@ import json
 import requests
 import xml.etree.ElementTree as ET
 import os
+from singleflight import single_flight
+from transcript_jobs import run_transcript_job, TranscriptJobError
+from artifact_cache import ArtifactCache
+from cache_backends import get_cache_backend, artifact_version
+from embedding_service import build_embeddings
+from vector_index import index_path, load_vectorstore, save_vectorstore, remove_vectorstores
+from llm_runtime import run_chain
+from transcript_store import TranscriptIndex, format_timestamp
+from transcript_search import TranscriptSearchIndex
+from caption_parser import CAPTION_FORMAT_PREFERENCE, get_caption_parser, parse_caption_stream
+from caption_tracks import resolve_caption_tracks, invalidate_caption_tracks, choose_caption_track
 GOOGLE_API_KEY = os.getenv('GOOGLE_API_KEY')
+# Connect/read timeouts for caption downloads and yt-dlp sockets
+TRANSCRIPT_HTTP_TIMEOUT = float(os.getenv('TRANSCRIPT_HTTP_TIMEOUT', 15))
 llm = ChatGoogleGenerativeAI(model="gemini-2.0-flash-lite-001", google_api_key=GOOGLE_API_KEY, max_output_tokens=4096)
-embeddings = GoogleGenerativeAIEmbeddings(model="models/embedding-001", google_api_key=GOOGLE_API_KEY)
-
-video_cache = {}
+VIDEO_EMBED_MODEL = "models/embedding-001"
+# Cached, batched embedding stack; EMBEDDING_PROVIDER=local swaps in the offline embedder
+embeddings = build_embeddings(VIDEO_EMBED_MODEL, google_api_key=GOOGLE_API_KEY)
 
 def parse_subtitle_content(subtitle_content, ext):
-  root = ET.fromstring(subtitle_content)
-  transcript = []
-  for elem in root.findall('text'):
-      start = float(elem.attrib['start'])
-      dur = float(elem.attrib.get('dur', 0))
-      text = elem.text or ''
-      transcript.append({
-          'start': start,
-          'duration': dur,
-          'text': text.replace('\n', ' ')
-    })
-  return transcript
-
-def fetch_transcript(video_id, preferred_langs=['en-orig', 'en']):
+  if isinstance(subtitle_content, str):
+      subtitle_content = subtitle_content.encode('utf-8')
+  return parse_caption_stream([subtitle_content], ext)
+
+def download_captions(track, cancel_event=None):
+    """Stream one caption track into the incremental parser. Returns None if cancelled."""
+    response = requests.get(track['url'], stream=True, timeout=TRANSCRIPT_HTTP_TIMEOUT)
+    response.raise_for_status()
+    # Parse as bytes arrive instead of holding the whole body
+    parser = get_caption_parser(track['ext'])
+    for chunk in response.iter_content(chunk_size=65536):
+        if cancel_event is not None and cancel_event.is_set():
+            response.close()
+            return None
+        parser.feed(chunk)
+    return parser.close()
+
+def fetch_transcript(video_id, preferred_langs=['en-orig', 'en'], cancel_event=None):
     youtube_url = f"https://www.youtube.com/watch?v={video_id}"
-    ydl_opts = {
-        'skip_download': True,
-        'writesubtitles': True,
-        'writeautomaticsub': True,
-        'quiet': True,
-        'no_warnings': True,
-        'log_warnings': False,
-        'format': 'bestaudio/best',
-    }
-
-    try:
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info_dict = ydl.extract_info(youtube_url, download=False)
-            
-            all_caption_tracks = {}
-
-            if 'subtitles' in info_dict:
-                for lang, tracks in info_dict['subtitles'].items():
-                    if lang not in all_caption_tracks:
-                        all_caption_tracks[lang] = []
-                    all_caption_tracks[lang].extend(tracks)
-            
-            if 'automatic_captions' in info_dict:
-                for lang, tracks in info_dict['automatic_captions'].items():
-                    if lang not in all_caption_tracks:
-                        all_caption_tracks[lang] = []
-                    all_caption_tracks[lang].extend(tracks)
-
-            best_transcript_url = None
-            best_transcript_ext = None
-
-            def find_first_non_json_track(tracks):
-                for track in tracks:
-                    ext = track.get('ext')
-                    if ext not in ['json', 'json3']:
-                        return track
-                return None # No suitable non-json track found
-
-            # 1. Try preferred languages first
-            for p_lang in preferred_langs:
-                if p_lang in all_caption_tracks:
-                    best_track = find_first_non_json_track(all_caption_tracks[p_lang])
-                    if best_track:
-                        best_transcript_url = best_track['url']
-                        best_transcript_ext = best_track['ext']
-                        print(f"Found preferred language '{p_lang}' track with extension '{best_transcript_ext}'.")
-                        break
-                if best_transcript_url:
-                    break
-            
-            # 2. If no suitable track found in preferred languages, try any other available language
-            if not best_transcript_url:
-                for lang, tracks in all_caption_tracks.items():
-                    if 'live_chat' in lang or lang in preferred_langs: 
-                        continue 
-                    best_track = find_first_non_json_track(tracks)
-                    if best_track:
-                        best_transcript_url = best_track['url']
-                        best_transcript_ext = best_track['ext']
-                        print(f"Found any language '{lang}' track with extension '{best_transcript_ext}'.")
-                        break
-
-            if best_transcript_url and best_transcript_ext:
-                try:
-                    print(f"Attempting to download transcript from: {best_transcript_url}")
-                    response = requests.get(best_transcript_url, stream=True)
-                    response.raise_for_status()
-                    subtitle_content = response.text
-                    return parse_subtitle_content(subtitle_content, best_transcript_ext)
-                except requests.exceptions.RequestException as e:
-                    print(f"Error fetching subtitle content from URL {best_transcript_url}: {e}")
-                    return []
+    # The resolved track list is cached, so only the first visit pays for yt-dlp;
+    # a rejected (expired) cached URL triggers one fresh resolution
+    for attempt in range(2):
+        try:
+            resolved = resolve_caption_tracks(video_id)
+        except yt_dlp.utils.DownloadError as e:
+            print(f"Error with yt-dlp (e.g., video not found, geo-restricted): {e}")
+            return []
+        except Exception as e:
+            print(f"An unexpected error occurred during yt-dlp extraction: {e}")
+            return []
+        if cancel_event is not None and cancel_event.is_set():
+            print(f"Transcript job cancelled for video ID: {video_id}")
+            return []
+
+        all_caption_tracks = resolved["tracks"]
+        lang, best_track = choose_caption_track(all_caption_tracks, preferred_langs)
+        if not best_track:
+            print(f"No supported ({', '.join(CAPTION_FORMAT_PREFERENCE)}) transcript URL found for {youtube_url} after checking all options.")
+            all_langs_found = set(all_caption_tracks.keys())
+            if all_langs_found:
+                print(f"Available caption languages found in info_dict (including potentially json/live_chat): {', '.join(all_langs_found)}")
             else:
-                print(f"No suitable non-json/json3 transcript URL found for {youtube_url} after checking all options.")
-                all_langs_found = set(all_caption_tracks.keys())
-                if all_langs_found:
-                    print(f"Available caption languages found in info_dict (including potentially json/live_chat): {', '.join(all_langs_found)}")
-                else:
-                    print("No caption tracks found at all in the info_dict.")
-                return []
+                print("No caption tracks found at all in the info_dict.")
+            return []
+        print(f"Found language '{lang}' track with extension '{best_track['ext']}'.")
 
-    except yt_dlp.utils.DownloadError as e:
-        print(f"Error with yt-dlp (e.g., video not found, geo-restricted): {e}")
-        return []
-    except Exception as e:
-        print(f"An unexpected error occurred during yt-dlp extraction: {e}")
-        return []
+        try:
+            print(f"Attempting to download transcript from: {best_track['url']}")
+            captions = download_captions(best_track, cancel_event)
+            if captions is None:
+                print(f"Transcript download cancelled for video ID: {video_id}")
+                return []
+            return captions
+        except requests.exceptions.HTTPError as e:
+            status = e.response.status_code if e.response is not None else None
+            if attempt == 0 and status in (403, 404, 410):
+                print(f"Caption URL rejected ({status}) for video ID {video_id}, re-resolving tracks")
+                invalidate_caption_tracks(video_id)
+                continue
+            print(f"Error fetching subtitle content from URL {best_track['url']}: {e}")
+            return []
+        except requests.exceptions.RequestException as e:
+            print(f"Error fetching subtitle content from URL {best_track['url']}: {e}")
+            return []
+        except (ET.ParseError, ValueError) as e:
+            print(f"Error parsing {best_track['ext']} captions from URL {best_track['url']}: {e}")
+            return []
+    return []
 
 # Manual Approach to fetch YouTube video transcripts
 # def fetch_transcript(video_id, max_retries=6, retry_delay=2):
@@ -192,82 +172,83 @@ def fetch_transcript(video_id, preferred_langs=['en-orig', 'en']):
 #             print(f"Error fetching transcript for video ID {video_id} on attempt {attempt}: {e}")
 #             time.sleep(retry_delay * attempt)
 
-def get_transcript(video_id):
-    """Fetch and cache video transcript with timestamps."""
+def get_transcript_index(video_id, cancel_event=None):
+    """Fetch and cache the time-indexed transcript, or return None."""
     # Check if transcript is already cached
-    if video_id in video_cache and "Transcript" in video_cache[video_id]:
+    if video_id in video_cache and "TranscriptIndex" in video_cache[video_id]:
         print(f"Using cached transcript for video ID: {video_id}")
-        return video_cache[video_id]["Transcript"]
-    
+        return video_cache[video_id]["TranscriptIndex"]
+
     try:
-        captions = fetch_transcript(video_id)
+        captions = fetch_transcript(video_id, cancel_event=cancel_event)
         if not captions:
             print(f"No transcript found for video ID: {video_id}")
-            return ''
-        # print(caption)
-        formatted_lines = []
-        for snippet in captions:
-            total_seconds = int(snippet['start'])
-            hours = total_seconds // 3600
-            minutes = (total_seconds % 3600) // 60
-            seconds = total_seconds % 60
-            timestamp = f"({hours:02}:{minutes:02}:{seconds:02})"
-            formatted_line = f"{timestamp} {snippet['text']}"
-            formatted_lines.append(formatted_line)
-        
-        full_transcript = " ".join(formatted_lines)
-        
+            return None
+
+        index = TranscriptIndex.from_captions(captions)
+
         # Initialize cache structure for this video
         if video_id not in video_cache:
             video_cache[video_id] = {}
-        video_cache[video_id]["Transcript"] = full_transcript
-        
-        return full_transcript
-        
+        video_cache[video_id]["TranscriptIndex"] = index
+
+        return index
+
     except Exception as e:
         print(f"Unexpected error fetching transcript: {e}")
-        return ''
-
-def get_clean_transcript(video_id):
-    """Get transcript without timestamps for better processing."""
-    # Check if clean transcript is already cached
-    if video_id in video_cache and "CleanTranscript" in video_cache[video_id]:
-        print(f"Using cached clean transcript for video ID: {video_id}")
-        return video_cache[video_id]["CleanTranscript"]
-    
-    # Get the full transcript (will use cache if available)
-    full_transcript = get_transcript(video_id)
-    if not full_transcript:
-        return ''
-    
-    # Remove timestamps to get clean text
-    clean_transcript = re.sub(r'\[\d{2}:\d{2}:\d{2}\]', '', full_transcript)
-    clean_transcript = re.sub(r'\s+', ' ', clean_transcript).strip()
-    
-    # Cache the clean transcript
-    video_cache[video_id]["CleanTranscript"] = clean_transcript
-    return clean_transcript
+        return None
 
-def chunk_transcript(transcript, chunk_size=1000, overlap=200):
-    """Split transcript into overlapping chunks for better context preservation."""
-    if not transcript:
+def get_transcript(video_id, cancel_event=None):
+    """Fetch and cache video transcript with timestamps."""
+    index = get_transcript_index(video_id, cancel_event=cancel_event)
+    return index.formatted() if index else ''
+
+async def load_transcript(video_id):
+    """Async transcript access; concurrent callers share one extraction per video."""
+    await video_cache.prefetch(video_id)
+    if video_id in video_cache and "TranscriptIndex" in video_cache[video_id]:
+        return video_cache[video_id]["TranscriptIndex"].formatted()
+    # Extraction runs on the bounded transcript pool with a deadline;
+    # raises TranscriptJobError when the queue is full or the job times out
+    return await single_flight(
+        f"video_transcript:{video_id}",
+        lambda: run_transcript_job(get_transcript, video_id)
+    )
+
+# Chunks are whole caption segments, closed at a token budget or time span,
+# with no overlap; each carries its start/end seconds as metadata
+TRANSCRIPT_CHUNK_TOKENS = int(os.getenv('TRANSCRIPT_CHUNK_TOKENS', 400))
+TRANSCRIPT_CHUNK_SECONDS = float(os.getenv('TRANSCRIPT_CHUNK_SECONDS', 120))
+TRANSCRIPT_CHUNK_PARAMS = f"segments,tokens={TRANSCRIPT_CHUNK_TOKENS},seconds={TRANSCRIPT_CHUNK_SECONDS}"
+
+def _chunk_document(index, lo, hi):
+    start = index.starts[lo]
+    end = index.starts[hi - 1] + index.durations[hi - 1]
+    header = f"{format_timestamp(start)[:-1]} - {format_timestamp(end)[1:]}"
+    return Document(
+        page_content=f"{header} {index.clean(lo, hi)}",
+        metadata={"start": start, "end": end}
+    )
+
+def chunk_transcript(index, max_tokens=TRANSCRIPT_CHUNK_TOKENS, max_seconds=TRANSCRIPT_CHUNK_SECONDS):
+    """Group caption segments into time-aligned chunks prefixed with their
+    (hh:mm:ss - hh:mm:ss) range, so retrieved context can be cited."""
+    if not index:
         return []
-    
-    words = transcript.split()
+
     chunks = []
-    
-    for i in range(0, len(words), chunk_size - overlap):
-        chunk_words = words[i:i + chunk_size]
-        chunk_text = ' '.join(chunk_words)
-        chunks.append(Document(page_content=chunk_text))
-        
-        # Break if we've reached the end
-        if i + chunk_size >= len(words):
-            break
-    
+    lo = 0
+    tokens = 0
+    for i in range(len(index)):
+        segment_tokens = len(index.segment_text(i)) // 4 + 1
+        if i > lo and (tokens + segment_tokens > max_tokens or index.starts[i] - index.starts[lo] > max_seconds):
+            chunks.append(_chunk_document(index, lo, i))
+            lo = i
+            tokens = 0
+        tokens += segment_tokens
+    chunks.append(_chunk_document(index, lo, len(index)))
     return chunks
 
-
 summary_prompt = PromptTemplate(
     input_variables=["text"],
     template="""
@@ -301,6 +282,156 @@ Return your output in this format:
 """
 )
 
+# Long transcripts are summarized map-reduce style: time-aligned sections are
+# summarized concurrently, then merged into the summary_prompt format
+VIDEO_SUMMARY_MAP_REDUCE_TOKENS = int(os.getenv('VIDEO_SUMMARY_MAP_REDUCE_TOKENS', 24000))
+VIDEO_SUMMARY_SECTION_TOKENS = int(os.getenv('VIDEO_SUMMARY_SECTION_TOKENS', 8000))
+VIDEO_SUMMARY_MAP_CONCURRENCY = int(os.getenv('VIDEO_SUMMARY_MAP_CONCURRENCY', 4))
+# A failed section is retried this many times; if it still fails, the whole
+# summary fails rather than caching one with a gap in it
+VIDEO_SUMMARY_SECTION_RETRIES = int(os.getenv('VIDEO_SUMMARY_SECTION_RETRIES', 2))
+VIDEO_SUMMARY_RETRY_DELAY = float(os.getenv('VIDEO_SUMMARY_RETRY_DELAY', 1.0))
+_TIMESTAMP_SPLIT_RE = re.compile(r'(?=\(\d{2}:\d{2}:\d{2}\))')
+_SECTION_START_RE = re.compile(r'\((\d{2}:\d{2}:\d{2})\)')
+
+section_prompt = PromptTemplate(
+    input_variables=["text"],
+    template="""
+IMPORTANT: Keep your entire response under 500 tokens. Be concise.
+
+You are summarizing one section of a longer YouTube video transcript. Each sentence is preceded by a timestamp in the format (hh:mm:ss).
+
+For this section only, return:
+- **Section Summary**: 2-4 sentences.
+- **Points**: bullet points, each starting with the timestamp (hh:mm:ss) where it is discussed.
+- **Claims**: factual assertions (dates, statistics, scientific or historical facts), each with its timestamp and a short note on whether it is accurate, misleading or unverifiable.
+
+**Transcript Section**:
+{text}
+
+**Output**:
+"""
+)
+
+merge_prompt = PromptTemplate(
+    input_variables=["text"],
+    template="""
+IMPORTANT: Keep your entire response under 1000 tokens. Be concise. Focus on essential insights. Avoid over-explaining or repeating.
+
+You are a helpful and critical-thinking assistant summarizing a long YouTube video. The video was split into consecutive time sections, and each section has already been summarized with timestamps in the format (hh:mm:ss). Combine them into one summary of the whole video, keeping the timestamps from the section notes.
+
+Your task is to:
+1. **Summarize**: Provide a clear and concise summary of the whole video, focusing on the main points, key takeaways, and any critical insights.
+
+2. **Main Points Covered**: List the main points discussed in the video using bullet points, in chronological order, with their timestamps.
+
+3. **Fact Check**: Evaluate the claims listed in the section notes. Flag inaccuracies or unsupported claims with a note, and provide a short explanation or correction when appropriate.
+
+Return your output in this format:
+- **Summary**: ...
+- **Main Points Covered**: ...
+- **Fact Check Notes**:
+  - [hh:mm:ss] Claim: "..." → ✅ True / ❌ False / ⚠️ Unverifiable
+    - Explanation: ...
+
+**Section Notes**:
+{text}
+
+**Output**:
+"""
+)
+
+def estimate_tokens(text):
+    # ~4 characters per token for English text
+    return len(text) // 4
+
+def split_transcript_sections(transcript, section_tokens=VIDEO_SUMMARY_SECTION_TOKENS):
+    """Split a timestamped transcript into consecutive sections of roughly
+    section_tokens each, cutting only at timestamp boundaries."""
+    sections = []
+    current = []
+    current_tokens = 0
+    for line in _TIMESTAMP_SPLIT_RE.split(transcript):
+        if not line.strip():
+            continue
+        line_tokens = estimate_tokens(line) + 1
+        if current and current_tokens + line_tokens > section_tokens:
+            sections.append("".join(current).strip())
+            current = []
+            current_tokens = 0
+        current.append(line)
+        current_tokens += line_tokens
+    if current:
+        sections.append("".join(current).strip())
+    return sections
+
+async def _summarize_section(section, semaphore):
+    chain = load_summarize_chain(llm=llm, chain_type="stuff", prompt=section_prompt)
+    for attempt in range(VIDEO_SUMMARY_SECTION_RETRIES + 1):
+        try:
+            async with semaphore:
+                response = await run_chain(chain, [Document(page_content=section)])
+            return response['output_text'].strip()
+        except Exception as e:
+            if attempt == VIDEO_SUMMARY_SECTION_RETRIES:
+                raise
+            print(f"Error summarizing transcript section, retrying: {e}")
+            await asyncio.sleep(VIDEO_SUMMARY_RETRY_DELAY * (attempt + 1))
+
+async def map_reduce_summary(transcript):
+    """Summarize sections concurrently (capped by VIDEO_SUMMARY_MAP_CONCURRENCY and
+    the global LLM limit), then merge the section notes in one final call.
+
+    Raises if any section still fails after its retries, so a summary with
+    missing sections is never returned (and never cached).
+    """
+    sections = split_transcript_sections(transcript)
+    semaphore = asyncio.Semaphore(VIDEO_SUMMARY_MAP_CONCURRENCY)
+    results = await asyncio.gather(
+        *(_summarize_section(section, semaphore) for section in sections),
+        return_exceptions=True
+    )
+
+    failures = [result for result in results if isinstance(result, Exception)]
+    if failures:
+        raise RuntimeError(f"{len(failures)} of {len(sections)} transcript sections failed to summarize: {failures[0]}")
+
+    notes = []
+    for section, result in zip(sections, results):
+        match = _SECTION_START_RE.search(section)
+        start = match.group(1) if match else "00:00:00"
+        notes.append(f"Section starting at ({start}):\n{result}")
+
+    merge_chain = load_summarize_chain(llm=llm, chain_type="stuff", prompt=merge_prompt)
+    response = await run_chain(merge_chain, [Document(page_content="\n\n".join(notes))])
+    return response['output_text'].strip()
+
+
+# Memory-bounded, LRU by video, per-artifact TTLs (seconds)
+VIDEO_CACHE_MAX_BYTES = int(os.getenv('VIDEO_CACHE_MAX_BYTES', 512 * 1024 * 1024))
+VIDEO_ARTIFACT_TTLS = {
+    "TranscriptIndex": 7 * 24 * 3600,
+    "TranscriptChunks": 7 * 24 * 3600,
+    "SearchIndex": 7 * 24 * 3600,
+    "Summary": 7 * 24 * 3600,
+    "Vectorstore": 24 * 3600,
+}
+# Artifacts shared with other workers through the L2 backend, versioned by
+# schema, model and prompt so replicas never reuse incompatible entries
+VIDEO_ARTIFACT_VERSIONS = {
+    "TranscriptIndex": artifact_version("transcript_index", 1),
+    "Summary": artifact_version(llm.model, summary_prompt.template, section_prompt.template,
+                                merge_prompt.template, VIDEO_SUMMARY_MAP_REDUCE_TOKENS, VIDEO_SUMMARY_SECTION_TOKENS),
+}
+video_cache = ArtifactCache(
+    max_bytes=VIDEO_CACHE_MAX_BYTES,
+    artifact_ttls=VIDEO_ARTIFACT_TTLS,
+    backend=get_cache_backend(),
+    namespace="video",
+    versions=VIDEO_ARTIFACT_VERSIONS,
+    codecs={"TranscriptIndex": (TranscriptIndex.to_dict, TranscriptIndex.from_dict)},
+)
+
 
 def get_video_qa_prompt(summary):
     """Create QA prompt template with video summary context and assertive reasoning."""
@@ -312,7 +443,7 @@ def get_video_qa_prompt(summary):
 Here is a summary of the video:
 {summary}
 
-Here are the most relevant transcript segments:
+Here are the most relevant transcript segments, each prefixed with its time range (hh:mm:ss - hh:mm:ss):
 {{context}}
 
 You will be asked questions about the video content, including factual accuracy, logic, reasoning, and opinions expressed by the speaker.
@@ -320,7 +451,7 @@ You will be asked questions about the video content, including factual accuracy,
 Your response should:
 - Be **honest, direct, and grounded** in general knowledge, logic, and factual correctness.
 - **Do not avoid critical analysis** of opinion-based or controversial takes—provide a clear and well-reasoned perspective based on known facts or expert consensus.
-- When possible, reference specific timestamps from the transcript.
+- When possible, reference specific timestamps from the transcript segments.
 - Avoid vague disclaimers like "this is subjective" or "it depends" unless no other conclusion is possible.
 - If the speaker's take is incorrect, misleading, or lacks evidence, **state that clearly and explain why**.
 - If the speaker makes a reasonable or accurate claim, acknowledge that as well.
@@ -342,39 +473,51 @@ def ensure_processed_transcript(video_id):
     if "TranscriptChunks" in video_cache[video_id]:
         return video_cache[video_id]["TranscriptChunks"]
     
-    # Get clean transcript (will use cache if available)
-    clean_transcript = get_clean_transcript(video_id)
-    if not clean_transcript:
+    # Only reads the cache: callers on the event loop load the transcript
+    # first with `await load_transcript(video_id)`
+    index = video_cache[video_id].get("TranscriptIndex")
+    if not index:
         return []
     
     # Create and cache transcript chunks
-    chunks = chunk_transcript(clean_transcript)
+    chunks = chunk_transcript(index)
     video_cache[video_id]["TranscriptChunks"] = chunks
     return chunks
 
 async def summarize_video(video_id):
     """Summarize video transcript with caching."""
+    await video_cache.prefetch(video_id)
     # Check if summary is already cached
     if video_id in video_cache and "Summary" in video_cache[video_id]:
         print(f"Using cached video summary for video ID: {video_id}")
         return video_cache[video_id]["Summary"]
-    
+
+    # Concurrent callers wait for a single summary build
+    return await single_flight(f"video_summary:{video_id}", lambda: _summarize_video(video_id))
+
+async def _summarize_video(video_id):
     # Get transcript (will use cache if available)
-    transcript = get_transcript(video_id)
+    try:
+        transcript = await load_transcript(video_id)
+    except TranscriptJobError as e:
+        return {"error": str(e)}
     if not transcript:
         return {"error": "No transcript found or unable to fetch transcript."}
     
     try:
-        
-        # Create document from transcript
-        transcript_docs = Document(page_content=transcript)
-        summary_chain = load_summarize_chain(
-            llm=llm,
-            chain_type="stuff",
-            prompt=summary_prompt
-        )
-        response = summary_chain.invoke([transcript_docs])
-        summary = response['output_text'].strip()
+        if estimate_tokens(transcript) > VIDEO_SUMMARY_MAP_REDUCE_TOKENS:
+            print(f"Using map-reduce summary for long transcript of video ID: {video_id}")
+            summary = await map_reduce_summary(transcript)
+        else:
+            # Create document from transcript
+            transcript_docs = Document(page_content=transcript)
+            summary_chain = load_summarize_chain(
+                llm=llm,
+                chain_type="stuff",
+                prompt=summary_prompt
+            )
+            response = await run_chain(summary_chain, [transcript_docs])
+            summary = response['output_text'].strip()
         if not summary:
             return {"error": "Summary generation failed or returned empty."}
         # Cache the summary
@@ -388,8 +531,31 @@ async def summarize_video(video_id):
         print(f"Error creating video summary: {e}")
         return {"error": f"Error creating summary: {str(e)}"}
 
+async def ensure_video_vectorstore(video_id, chunks):
+    """Build the transcript vectorstore once per video; concurrent callers share the build."""
+    if "Vectorstore" in video_cache.get(video_id, {}):
+        print(f"Using cached vectorstore for video ID: {video_id}")
+        return video_cache[video_id]["Vectorstore"]
+
+    async def _build():
+        path = index_path("video", video_id, embeddings.model_name, TRANSCRIPT_CHUNK_PARAMS,
+                          [chunk.page_content for chunk in chunks])
+        # Reuse an index saved by any worker before paying for re-embedding
+        vectorstore = await asyncio.to_thread(load_vectorstore, path, embeddings)
+        if vectorstore is not None:
+            print(f"Loaded saved vectorstore for video ID: {video_id}")
+        else:
+            print(f"Creating and caching vectorstore for video ID: {video_id}")
+            vectorstore = await FAISS.afrom_documents(chunks, embeddings)
+            await asyncio.to_thread(save_vectorstore, vectorstore, path)
+        video_cache.setdefault(video_id, {})["Vectorstore"] = vectorstore
+        return vectorstore
+
+    return await single_flight(f"video_vectorstore:{video_id}", _build)
+
 async def answer_video_question(video_id, question):
     """Answer questions about video content using transcript and summary."""
+    await video_cache.prefetch(video_id)
     # Ensure we have summary (will create if not cached)
     if video_id not in video_cache or "Summary" not in video_cache[video_id]:
         summary = await summarize_video(video_id)
@@ -398,23 +564,22 @@ async def answer_video_question(video_id, question):
     else:
         print(f"Using cached video summary for video ID: {video_id}")
         summary = video_cache[video_id]["Summary"]
-    
+
+    # The summary may outlive the transcript (e.g. an L2 copy); fetch it off the loop
+    try:
+        await load_transcript(video_id)
+    except TranscriptJobError as e:
+        return {"error": str(e)}
+
     # Get processed transcript chunks (will process if not cached)
     chunks = ensure_processed_transcript(video_id)
     if not chunks:
         return {"error": "No transcript chunks found after processing."}
     
-    # Check if vectorstore is already cached
-    if "Vectorstore" not in video_cache[video_id]:
-        print(f"Creating and caching vectorstore for video ID: {video_id}")
-        try:
-            vectorstore = FAISS.from_documents(chunks, embeddings)
-            video_cache[video_id]["Vectorstore"] = vectorstore
-        except Exception as e:
-            return {"error": f"Error creating vectorstore: {str(e)}"}
-    else:
-        print(f"Using cached vectorstore for video ID: {video_id}")
-        vectorstore = video_cache[video_id]["Vectorstore"]
+    try:
+        vectorstore = await ensure_video_vectorstore(video_id, chunks)
+    except Exception as e:
+        return {"error": f"Error creating vectorstore: {str(e)}"}
     
     try:
         # Create QA chain
@@ -428,7 +593,7 @@ async def answer_video_question(video_id, question):
             chain_type_kwargs={"prompt": qa_prompt},
         )
 
-        answer = qa_chain(question)
+        answer = await run_chain(qa_chain, {"query": question})
         return answer['result']
         
     except Exception as e:
@@ -440,65 +605,100 @@ def clear_video_cache(video_id=None):
     """Clear cache for a specific video or all videos."""
     global video_cache
     if video_id:
-        if video_id in video_cache:
-            del video_cache[video_id]
+        # Also drops copies held only in the shared cache
+        if video_cache.discard(video_id):
             print(f"Video cache cleared for video ID: {video_id}")
+        remove_vectorstores("video", video_id)
     else:
         video_cache.clear()
+        remove_vectorstores("video")
         print("All video cache cleared")
 
 def get_video_cache_stats():
     """Get statistics about what's cached for videos."""
     stats = {}
-    for video_id, data in video_cache.items():
+    for video_id, data in video_cache.peek_items():
         stats[video_id] = {
-            "has_transcript": "Transcript" in data,
-            "has_clean_transcript": "CleanTranscript" in data,
+            "size_bytes": data.size,
+            "artifact_bytes": data.artifact_sizes(),
+            "has_transcript": "TranscriptIndex" in data,
             "has_transcript_chunks": "TranscriptChunks" in data,
+            "has_search_index": "SearchIndex" in data,
             "has_summary": "Summary" in data,
             "has_vectorstore": "Vectorstore" in data,
-            "transcript_length": len(data.get("Transcript", "")),
-            "clean_transcript_length": len(data.get("CleanTranscript", "")),
+            "transcript_segments": len(data["TranscriptIndex"]) if "TranscriptIndex" in data else 0,
+            "transcript_text_length": len(data["TranscriptIndex"].text) if "TranscriptIndex" in data else 0,
             "chunk_count": len(data.get("TranscriptChunks", []))
         }
     return stats
 
+def get_video_cache_metrics():
+    """Get size, eviction and expiry metrics for the video cache."""
+    return video_cache.metrics()
+
 def get_transcript_preview(video_id, max_chars=500):
     """Get a preview of the transcript for debugging."""
-    if video_id in video_cache and "Transcript" in video_cache[video_id]:
-        transcript = video_cache[video_id]["Transcript"]
-        if len(transcript) > max_chars:
+    if video_id in video_cache and "TranscriptIndex" in video_cache[video_id]:
+        index = video_cache[video_id]["TranscriptIndex"]
+        # Format only as many segments as the preview can show
+        hi = min(len(index), max_chars // 2 + 1)
+        transcript = index.formatted(0, hi)
+        if len(transcript) > max_chars or hi < len(index):
             return transcript[:max_chars] + "..."
         return transcript
     return "No transcript found in cache"
 
-# Advanced utility: Get transcript segments by time range
-def get_transcript_segment(video_id, start_time=None, end_time=None):
-    """Get transcript segment between specified timestamps (in seconds)."""
-    if video_id not in video_cache or "Transcript" not in video_cache[video_id]:
-        return "Transcript not found in cache"
-    
-    transcript = video_cache[video_id]["Transcript"]
-    
-    # If no time range specified, return full transcript
-    if start_time is None and end_time is None:
-        return transcript
-    
-    # Extract segments based on timestamps
-    segments = []
-    timestamp_pattern = r'\[(\d{2}):(\d{2}):(\d{2})\]([^[]*)'
-    matches = re.findall(timestamp_pattern, transcript)
-    
-    for match in matches:
-        hours, minutes, seconds, text = match
-        timestamp_seconds = int(hours) * 3600 + int(minutes) * 60 + int(seconds)
-        
-        # Check if timestamp is within range
-        if start_time is not None and timestamp_seconds < start_time:
-            continue
-        if end_time is not None and timestamp_seconds > end_time:
-            break
-            
-        segments.append(f"[{hours}:{minutes}:{seconds}]{text}")
-    
-    return " ".join(segments)
\ No newline at end of file
+async def get_transcript_window(video_id, start_time=None, end_time=None):
+    """Segments overlapping a time window, fetching the transcript if needed."""
+    try:
+        await load_transcript(video_id)
+    except TranscriptJobError as e:
+        return {"error": str(e)}
+    index = video_cache.get(video_id, {}).get("TranscriptIndex")
+    if not index:
+        return {"error": "No transcript found or unable to fetch transcript."}
+
+    lo, hi = index.window(start_time, end_time)
+    return {
+        "start_time": start_time,
+        "end_time": end_time,
+        "segments": index.segments(start_time, end_time),
+        "text": index.formatted(lo, hi)
+    }
+
+def get_search_index(video_id):
+    """Inverted index over a cached transcript, built on first search."""
+    entry = video_cache.get(video_id)
+    if entry is None or "TranscriptIndex" not in entry:
+        return None
+    if "SearchIndex" not in entry:
+        entry["SearchIndex"] = TranscriptSearchIndex(entry["TranscriptIndex"])
+    return entry["SearchIndex"]
+
+async def search_transcript(video_id, query, limit=20, require_all=False):
+    """Find where a video mentions terms or "quoted phrases"; no LLM or embedding calls."""
+    try:
+        await load_transcript(video_id)
+    except TranscriptJobError as e:
+        return {"error": str(e)}
+    index = get_search_index(video_id)
+    if index is None:
+        return {"error": "No transcript found or unable to fetch transcript."}
+    return index.search(query, limit=limit, require_all=require_all)
+
+def search_cached_transcripts(query, limit=20, require_all=False):
+    """Search every transcript currently cached, without fetching new ones."""
+    results = {}
+    for video_id, data in video_cache.peek_items():
+        # Read-only scan: storing a new SearchIndex would move every video to the
+        # front of the LRU, so transcripts not yet searched get a throwaway index
+        index = data.get("SearchIndex")
+        if index is None:
+            transcript = data.get("TranscriptIndex")
+            if transcript is None:
+                continue
+            index = TranscriptSearchIndex(transcript)
+        found = index.search(query, limit=limit, require_all=require_all)
+        if found["hits"]:
+            results[video_id] = found
+    return results
@@ -0,0 +1,72 @@
+import asyncio
+import os
+import dotenv
+from http_client import get_session
+from singleflight import single_flight
+dotenv.load_dotenv()
+
+API_KEY_VIDEO = os.getenv('API_KEY_VIDEO')
+BASE_URL = "https://www.googleapis.com/youtube/v3"
+
+# videos.list and channels.list accept at most 50 comma-separated ids per call
+MAX_IDS_PER_REQUEST = 50
+
+def _unique(ids):
+    """Drop empty and duplicate ids while keeping first-seen order."""
+    seen = set()
+    unique_ids = []
+    for item_id in ids:
+        if item_id and item_id not in seen:
+            seen.add(item_id)
+            unique_ids.append(item_id)
+    return unique_ids
+
+async def _fetch_batch(resource, part, ids):
+    url = f"{BASE_URL}/{resource}?part={part}&id={','.join(ids)}&key={API_KEY_VIDEO}"
+    session = get_session()
+    try:
+        async with session.get(url) as response:
+            if response.status == 200:
+                result = await response.json()
+                return result.get("items", [])
+            print(f"Failed to fetch {resource} batch. Status code: {response.status}")
+            return None
+    except Exception as e:
+        print(f"Error fetching {resource} batch: {e}")
+        return None
+
+async def _fetch_by_ids(resource, part, ids, failed_ids=None):
+    """Fetch items for the given ids, one request per 50 ids, batches run concurrently.
+
+    Ids whose batch request failed are added to `failed_ids` when a set is given,
+    so callers can tell "does not exist" apart from "could not be fetched".
+    """
+    ids = _unique(ids)
+    if not ids:
+        return {}
+    batches = [ids[i:i + MAX_IDS_PER_REQUEST] for i in range(0, len(ids), MAX_IDS_PER_REQUEST)]
+    results = await asyncio.gather(*(_fetch_batch(resource, part, batch) for batch in batches))
+    items_by_id = {}
+    for batch, items in zip(batches, results):
+        if items is None:
+            if failed_ids is not None:
+                failed_ids.update(batch)
+            continue
+        for item in items:
+            items_by_id[item["id"]] = item
+    return items_by_id
+
+async def fetch_videos_by_ids(video_ids):
+    """Return a dict of video id -> videos.list item (snippet, statistics, contentDetails)."""
+    return await _fetch_by_ids("videos", "snippet,statistics,contentDetails", video_ids)
+
+async def fetch_channels_by_ids(channel_ids, failed_ids=None):
+    """Return a dict of channel id -> channels.list item (snippet, contentDetails, statistics)."""
+    return await _fetch_by_ids("channels", "snippet%2CcontentDetails%2Cstatistics", channel_ids, failed_ids)
+
+async def fetch_video_by_id(video_id):
+    """Return one videos.list item, sharing the request with concurrent callers."""
+    async def _fetch():
+        videos = await fetch_videos_by_ids([video_id])
+        return videos.get(video_id)
+    return await single_flight(f"video_details:{video_id}", _fetch)